@@ -13,13 +13,22 @@ import NoResults from "./components/NoResults";
 
 import './css/App.css';
 
+const PAGE_SIZE = 20;
+
+function getCategoryKey(category){
+  return category.id === null ? 'none' : String(category.id);
+}
+
 class App extends Component {
 
   constructor(props){
     super();
     this.state = {
       banners: [],  // null represent "Loading" state, will be replaced by Array on server response
-      products: null,  // null represent "Loading" state, will be replaced by Array on server response
+      categories: null,  // null represent "Loading" state, will be replaced by Array on server response
+      menuPages: {},  // loaded products and next page cursor by category key
+      popularProducts: [],
+      searchResults: null,
       term: '',
       cart: [],
       quickViewProduct: null,  // will be replaced by selected product attributes
@@ -101,8 +110,8 @@ class App extends Component {
   }
 
 
-  async getProducts(){
-    let response = await fetch('/api/products/', {
+  async fetchJSON(url){
+    let response = await fetch(url, {
       headers: {
         'Accept': 'application/json',
         'Content-Type': 'application/json',
@@ -110,12 +119,67 @@ class App extends Component {
     });
 
     if (!response.ok){
+      return null;
+    }
+    return await response.json();
+  }
+
+  // Only the first page of every category is loaded, the rest on demand
+  async getCategories(){
+    let categories = await this.fetchJSON('/api/categories/');
+    if (!categories){
       return;
     }
+    this.setState({
+      categories: categories
+    });
+    categories.forEach(category => this.loadCategoryPage(category));
+  }
 
-    let data = await response.json();
+  async loadCategoryPage(category){
+    let key = getCategoryKey(category);
+    let page = this.state.menuPages[key];
+    let params = new URLSearchParams({category: key, limit: PAGE_SIZE});
+    if (page && page.nextCursor){
+      params.set('cursor', page.nextCursor);
+    }
+
+    let data = await this.fetchJSON(`/api/products/?${params}`);
+    if (!data){
+      return;
+    }
+    this.setState(state => {
+      let loadedProducts = state.menuPages[key] ? state.menuPages[key].products : [];
+      return {
+        menuPages: {
+          ...state.menuPages,
+          [key]: {
+            products: [...loadedProducts, ...data.products],
+            nextCursor: data.next_cursor,
+          },
+        },
+      };
+    });
+  }
+
+  async getPopularProducts(){
+    let data = await this.fetchJSON(`/api/products/?special=1&limit=${PAGE_SIZE}`);
+    if (!data){
+      return;
+    }
     this.setState({
-      products : data
+      popularProducts: data.products
+    });
+  }
+
+  async searchProducts(term){
+    let data = await this.fetchJSON(`/api/products/search/?${new URLSearchParams({q: term})}`);
+    // Answers may come out of order, keep only the one for the current input
+    if (!data || this.state.term !== term){
+      return;
+    }
+    this.setState({
+      searchResults: data
     });
   }
 
@@ -138,14 +202,19 @@ class App extends Component {
   }
 
   componentDidMount(){
-    this.getProducts();
+    this.getCategories();
+    this.getPopularProducts();
     this.getBanners();
   }
 
 
   // Search by Keyword
   handleSearch(event){
-    this.setState({term: event.target.value});
+    let term = event.target.value;
+    this.setState({term: term, searchResults: null});
+    if (_.trim(term)){
+      this.searchProducts(term);
+    }
   }
 
   handleCartClose() {
@@ -217,47 +286,46 @@ class App extends Component {
     let menuBlocks = [];
     let normalizedTerm = _.lowerCase(_.trim(this.state.term));
 
-    if (this.state.products){
-      let filteredProducts = this.state.products;
-
-      if (normalizedTerm){
-        filteredProducts = this.state.products.filter(product => !normalizedTerm || product.name.toLowerCase().includes(normalizedTerm));
-      } else {
-        let highlightedProducts = this.state.products.filter(x => x.special_status);
-
-        if (highlightedProducts.length){
-          menuBlocks.push(
-            <div style={{marginTop:"50px"}} className="form-group" key={'_popular'}>
-              <center>
-                <h2>Популярное</h2>
-                <hr/>
-              </center>
+    const renderMenuBlock = (key, title, products, footer) => (
+      <div style={{marginTop:"50px"}} className="form-group" key={key}>
+        <center>
+          <h2>{ title }</h2>
+          <hr/>
+        </center>
+
+        <Products
+          productsList={products}
+          addToCart={this.handleAddToCart}
+          openModal={this.handleQuickViewModalShow}
+        />
+        { footer }
+      </div>
+    );
 
-              <Products
-                productsList={highlightedProducts}
-                addToCart={this.handleAddToCart}
-                openModal={this.handleQuickViewModalShow}
-              />
-            </div>
-          )
-        }
+    if (normalizedTerm){
+      let menuGroups = _.groupBy(this.state.searchResults || [], product => product.category && product.category.name || '');
+      menuBlocks.push(...Object.entries(menuGroups).map(
+        ([groupName, products], index) => renderMenuBlock(index, groupName, products)
+      ));
+    } else if (this.state.categories){
+      if (this.state.popularProducts.length){
+        menuBlocks.push(renderMenuBlock('_popular', 'Популярное', this.state.popularProducts));
       }
 
-      let menuGroups = _.groupBy(filteredProducts, product => product.category && product.category.name || '');
-      menuBlocks.push(...Object.entries(menuGroups).map( ([groupName, products], index) => (
-        <div style={{marginTop:"50px"}} className="form-group" key={index}>
+      this.state.categories.forEach(category => {
+        let page = this.state.menuPages[getCategoryKey(category)];
+        if (!page || !page.products.length){
+          return;
+        }
+        let loadMoreButton = page.nextCursor && (
           <center>
-            <h2>{ groupName }</h2>
-            <hr/>
+            <button className="btn btn-default" onClick={() => this.loadCategoryPage(category)}>
+              Показать ещё
+            </button>
           </center>
-
-          <Products
-            productsList={products}
-            addToCart={this.handleAddToCart}
-            openModal={this.handleQuickViewModalShow}
-          />
-        </div>
-      )));
+        );
+        menuBlocks.push(renderMenuBlock(getCategoryKey(category), category.name || '', page.products, loadMoreButton));
+      });
     }
 
     return (
@@ -304,7 +372,7 @@ class App extends Component {
             <div className="col-md-3 col-lg-3"></div>
           </div>
 
-          { !this.state.products && (
+          { (!this.state.categories || (normalizedTerm && !this.state.searchResults)) && (
             <div>
               <center>
                 <h2>Меню Star Burger</h2>
@@ -314,11 +382,11 @@ class App extends Component {
             </div>
           )}
 
-          { this.state.products && normalizedTerm && !menuBlocks.length && (
+          { this.state.searchResults && normalizedTerm && !menuBlocks.length && (
             <NoResults />
           )}
 
-          { this.state.products && !normalizedTerm && !menuBlocks.length && (
+          { this.state.categories && !normalizedTerm && !this.state.categories.length && (
             <div className="row">
               <div className="col-6">
                 <center>
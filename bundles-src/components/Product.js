@@ -38,7 +38,8 @@ class Product extends Component{
   }
 
   render(){
-    let image = this.props.product.image;
+    let renditions = this.props.product.image_renditions;
+    let image = renditions ? renditions.card : this.props.product.image;
     let name = this.props.product.name;
     let price = this.props.product.price;
     let id = this.props.product.id;
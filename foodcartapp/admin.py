@@ -1,18 +1,44 @@
 from django.contrib import admin
-from django.shortcuts import reverse
-from django.templatetags.static import static
+from django.urls import reverse
 from django.utils.html import format_html
 
+from .availability import set_menu_availability
+from .models import Banner
+from .models import Order
+from .models import OrderItem
 from .models import Product
 from .models import ProductCategory
 from .models import Restaurant
 from .models import RestaurantMenuItem
+from .renditions import get_rendition_url
+from .search import filter_products
 
 
-class RestaurantMenuItemInline(admin.TabularInline):
+class StaticChoicesInlineMixin:
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if formfield is None:
+            return formfield
+
+        # Without a static list every row of the formset runs its own query
+        # for the choices. Admin builds the formset several times per page,
+        # so the list is also cached on the request.
+        cached_choices = request.__dict__.setdefault('_admin_fk_choices', {})
+        cache_key = (self.model._meta.label, db_field.name)
+        if cache_key not in cached_choices:
+            cached_choices[cache_key] = [*iter(formfield.choices)]
+        formfield.choices = cached_choices[cache_key]
+        return formfield
+
+
+class RestaurantMenuItemInline(StaticChoicesInlineMixin, admin.TabularInline):
     model = RestaurantMenuItem
     extra = 0
 
+    def get_queryset(self, request):
+        # Every row prints its __str__, which touches both related objects
+        return super().get_queryset(request).select_related('restaurant', 'product')
+
 
 @admin.register(Restaurant)
 class RestaurantAdmin(admin.ModelAdmin):
@@ -29,6 +55,26 @@ class RestaurantAdmin(admin.ModelAdmin):
     inlines = [
         RestaurantMenuItemInline
     ]
+    actions = [
+        'make_all_products_available',
+        'make_all_products_unavailable',
+    ]
+
+    def set_all_products_availability(self, request, queryset, available):
+        changed_count = set_menu_availability(
+            queryset.values_list('pk', flat=True),
+            Product.objects.values_list('pk', flat=True),
+            available,
+        )
+        self.message_user(request, f'Изменено пунктов меню: {changed_count}')
+
+    @admin.action(description='Включить в меню все товары')
+    def make_all_products_available(self, request, queryset):
+        self.set_all_products_availability(request, queryset, True)
+
+    @admin.action(description='Убрать из продажи все товары')
+    def make_all_products_unavailable(self, request, queryset):
+        self.set_all_products_availability(request, queryset, False)
 
 
 @admin.register(Product)
@@ -42,12 +88,15 @@ class ProductAdmin(admin.ModelAdmin):
     list_display_links = [
         'name',
     ]
+    list_select_related = [
+        'category',
+    ]
     list_filter = [
         'category',
     ]
     search_fields = [
-        # FIXME SQLite can not convert letter case for cyrillic words properly, so search will be buggy.
-        # Migration to PostgreSQL is necessary
+        # Only shows the search box, get_search_results goes to the full-text index
+        # which folds cyrillic case on SQLite too, see migration 0047
         'name',
         'category__name',
     ]
@@ -55,6 +104,10 @@ class ProductAdmin(admin.ModelAdmin):
     inlines = [
         RestaurantMenuItemInline
     ]
+    actions = [
+        'make_available_everywhere',
+        'make_unavailable_everywhere',
+    ]
     fieldsets = (
         ('Общее', {
             'fields': [
@@ -83,24 +136,122 @@ class ProductAdmin(admin.ModelAdmin):
     class Media:
         css = {
             "all": (
-                static("admin/foodcartapp.css")
+                "admin/foodcartapp.css",
             )
         }
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        # The changelist keeps the rank order unless a column is sorted
+        return filter_products(queryset, search_term), False
+
     def get_image_preview(self, obj):
         if not obj.image:
             return 'выберите картинку'
-        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=obj.image.url)
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=get_rendition_url(obj.image.name, 'card'))
     get_image_preview.short_description = 'превью'
 
     def get_image_list_preview(self, obj):
         if not obj.image or not obj.id:
             return 'нет картинки'
-        edit_url = reverse('admin:foodcartapp_product_change', args=(obj.id,))
-        return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=obj.image.url)
+        edit_url = reverse('admin:foodcartapp_product_change', args=[obj.id])
+        src = get_rendition_url(obj.image.name, 'small')
+        return format_html('<a href="{edit_url}"><img src="{src}" style="max-height: 50px;"/></a>', edit_url=edit_url, src=src)
     get_image_list_preview.short_description = 'превью'
 
+    def set_availability_everywhere(self, request, queryset, available):
+        changed_count = set_menu_availability(
+            Restaurant.objects.values_list('pk', flat=True),
+            queryset.values_list('pk', flat=True),
+            available,
+        )
+        self.message_user(request, f'Изменено пунктов меню: {changed_count}')
+
+    @admin.action(description='Включить в меню всех ресторанов')
+    def make_available_everywhere(self, request, queryset):
+        self.set_availability_everywhere(request, queryset, True)
+
+    @admin.action(description='Убрать из продажи во всех ресторанах')
+    def make_unavailable_everywhere(self, request, queryset):
+        self.set_availability_everywhere(request, queryset, False)
+
 
 @admin.register(ProductCategory)
 class ProductAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'get_image_list_preview',
+        'title',
+        'text',
+        'active',
+        'order',
+    ]
+    list_display_links = [
+        'title',
+    ]
+    list_editable = [
+        'active',
+        'order',
+    ]
+    readonly_fields = [
+        'get_image_preview',
+    ]
+
+    class Media:
+        js = (
+            "admin/banner_ordering.js",
+        )
+
+    def get_image_preview(self, obj):
+        if not obj.image:
+            return 'выберите картинку'
+        return format_html('<img src="{url}" style="max-height: 200px;"/>', url=get_rendition_url(obj.image.name, 'carousel_small'))
+    get_image_preview.short_description = 'превью'
+
+    def get_image_list_preview(self, obj):
+        if not obj.image:
+            return 'нет картинки'
+        return format_html('<img src="{src}" style="max-height: 50px;"/>', src=get_rendition_url(obj.image.name, 'carousel_small'))
+    get_image_list_preview.short_description = 'превью'
+
+
+class OrderItemInline(StaticChoicesInlineMixin, admin.TabularInline):
+    model = OrderItem
+    extra = 0
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'firstname',
+        'lastname',
+        'phonenumber',
+        'address',
+        'status',
+        'restaurant',
+        'created_at',
+    ]
+    list_select_related = [
+        'restaurant',
+    ]
+    list_filter = [
+        'status',
+    ]
+    search_fields = [
+        'firstname',
+        'lastname',
+        'phonenumber',
+        'address',
+    ]
+    inlines = [
+        OrderItemInline
+    ]
@@ -0,0 +1,65 @@
+from collections import namedtuple
+
+from places.coordinates import fetch_coordinates
+from places.distance import haversine_matrix
+
+from .availability import get_availability_index
+from .models import Restaurant
+
+
+RestaurantCandidate = namedtuple('RestaurantCandidate', ['restaurant', 'distance'])
+
+
+def rank_restaurants(orders):
+    """Return {order.id: [RestaurantCandidate, ...]} nearest first.
+
+    Only restaurants that can cook every item of the order are candidates.
+    The orders must come with prefetched items: the whole batch costs a
+    fixed number of queries however many orders there are. Distances for
+    all (order, restaurant) pairs are computed as one matrix. Addresses are
+    geocoded when orders are accepted, here they are only read from the
+    cache, and an address missing from it has an unknown distance.
+    """
+    availability_index = get_availability_index()
+    restaurants = Restaurant.objects.in_bulk()
+
+    candidate_ids_by_order = {
+        order.id: availability_index.get_restaurants_for(item.product_id for item in order.items.all())
+        for order in orders
+    }
+    order_coordinates = fetch_coordinates((order.address for order in orders), geocode=False)
+
+    located_addresses = sorted({
+        order.address for order in orders if order_coordinates.get(order.address)
+    })
+    located_restaurant_ids = sorted(
+        restaurant.id for restaurant in restaurants.values() if restaurant.coordinates
+    )
+    distances = haversine_matrix(
+        [order_coordinates[address] for address in located_addresses],
+        [restaurants[restaurant_id].coordinates for restaurant_id in located_restaurant_ids],
+    )
+    address_positions = {address: position for position, address in enumerate(located_addresses)}
+    restaurant_positions = {
+        restaurant_id: position for position, restaurant_id in enumerate(located_restaurant_ids)
+    }
+
+    ranked_restaurants = {}
+    for order in orders:
+        address_position = address_positions.get(order.address)
+        candidates = []
+        for restaurant_id in candidate_ids_by_order[order.id]:
+            restaurant_position = restaurant_positions.get(restaurant_id)
+            if address_position is None or restaurant_position is None:
+                distance = None
+            else:
+                distance = float(distances[address_position][restaurant_position])
+            candidates.append(RestaurantCandidate(restaurants[restaurant_id], distance))
+
+        candidates.sort(key=lambda candidate: (
+            candidate.distance is None,
+            candidate.distance or 0,
+            candidate.restaurant.name,
+        ))
+        ranked_restaurants[order.id] = candidates
+    return ranked_restaurants
@@ -0,0 +1,169 @@
+import threading
+from functools import partial
+from operator import itemgetter
+
+from django.db import transaction
+
+from .menu_cache import bump_catalog_version, get_catalog_version
+from .models import Restaurant, RestaurantMenuItem
+from .restaurant_menus import sync_menu_entries
+
+
+def _iter_set_bits(mask):
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+
+class AvailabilityIndex:
+    """Which restaurants can cook which products, as one bitset per product.
+
+    Bit N of a product bitset is set when the restaurant at position N has
+    the product available. "Who can cook all of these" is then a bitwise AND
+    of a few Python ints instead of a query or a loop over menu items.
+    """
+
+    def __init__(self, restaurant_ids, available_pairs, version=None):
+        self.version = version
+        self.restaurant_ids = []
+        self.restaurant_positions = {}
+        self.bitsets = {}
+        for restaurant_id in restaurant_ids:
+            self._get_position(restaurant_id)
+        for product_id, restaurant_id in available_pairs:
+            self.set_availability(restaurant_id, product_id, True)
+
+    @classmethod
+    def load(cls, version=None):
+        restaurant_ids = Restaurant.objects.order_by('pk').values_list('pk', flat=True)
+        available_pairs = (
+            RestaurantMenuItem.objects
+            .filter(availability=True)
+            .values_list('product_id', 'restaurant_id')
+        )
+        return cls(restaurant_ids, available_pairs, version=version)
+
+    def _get_position(self, restaurant_id):
+        position = self.restaurant_positions.get(restaurant_id)
+        if position is None:
+            position = len(self.restaurant_ids)
+            self.restaurant_ids.append(restaurant_id)
+            self.restaurant_positions[restaurant_id] = position
+        return position
+
+    def set_availability(self, restaurant_id, product_id, available):
+        bit = 1 << self._get_position(restaurant_id)
+        bitset = self.bitsets.get(product_id, 0)
+        bitset = bitset | bit if available else bitset & ~bit
+        if bitset:
+            self.bitsets[product_id] = bitset
+        else:
+            self.bitsets.pop(product_id, None)
+
+    def is_available(self, product_id, restaurant_id=None):
+        bitset = self.bitsets.get(product_id, 0)
+        if restaurant_id is None:
+            return bool(bitset)
+        position = self.restaurant_positions.get(restaurant_id)
+        return position is not None and bool(bitset >> position & 1)
+
+    def filter_available(self, rows, key=itemgetter('id')):
+        """Yield product rows whose product some restaurant has available.
+
+        Rows are filtered here rather than in SQL, so the query needs neither a
+        join with menu items nor a list of every available id.
+        """
+        bitsets = self.bitsets
+        return (row for row in rows if key(row) in bitsets)
+
+    def get_availability_row(self, product_id, restaurant_ids):
+        bitset = self.bitsets.get(product_id, 0)
+        positions = self.restaurant_positions
+        return [
+            restaurant_id in positions and bool(bitset >> positions[restaurant_id] & 1)
+            for restaurant_id in restaurant_ids
+        ]
+
+    def get_restaurants_for(self, product_ids):
+        """Return ids of restaurants that have every one of the products."""
+        product_ids = set(product_ids)
+        if not product_ids:
+            return frozenset()
+        mask = -1
+        for product_id in product_ids:
+            mask &= self.bitsets.get(product_id, 0)
+            if not mask:
+                return frozenset()
+        return frozenset(self.restaurant_ids[position] for position in _iter_set_bits(mask))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_availability_index():
+    """Return the process-wide index, reloading it if the catalog changed elsewhere."""
+    global _index
+    version = get_catalog_version()
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = AvailabilityIndex.load(version=version)
+        return _index
+
+
+def apply_catalog_change(menu_item_changes=()):
+    """Bump the catalog version and carry the local index over to it.
+
+    menu_item_changes is an iterable of (restaurant_id, product_id, available).
+    The index is patched in place only if the bump is known to follow the
+    version the index was loaded at; otherwise another process may have
+    changed the catalog in between, and the index is reloaded on the next
+    access.
+    """
+    previous_version, version = bump_catalog_version()
+    with _index_lock:
+        if _index is None or previous_version is None or _index.version != previous_version:
+            return
+        for restaurant_id, product_id, available in menu_item_changes:
+            _index.set_availability(restaurant_id, product_id, available)
+        _index.version = version
+
+
+def set_menu_availability(restaurant_ids, product_ids, available):
+    """Set availability of every product in every restaurant, return the number of changed pairs.
+
+    The whole batch is one bulk_update plus, when enabling, one bulk_create
+    for missing menu items. Caches are invalidated once for the batch.
+    """
+    restaurant_ids = set(restaurant_ids)
+    product_ids = set(product_ids)
+    with transaction.atomic():
+        menu_items = list(
+            RestaurantMenuItem.objects
+            .filter(restaurant_id__in=restaurant_ids, product_id__in=product_ids)
+            .only('id', 'restaurant_id', 'product_id', 'availability')
+        )
+        changed_items = [item for item in menu_items if item.availability != available]
+        for item in changed_items:
+            item.availability = available
+        RestaurantMenuItem.objects.bulk_update(changed_items, ['availability'])
+
+        changes = [(item.restaurant_id, item.product_id, available) for item in changed_items]
+        if available:
+            existing_pairs = {(item.restaurant_id, item.product_id) for item in menu_items}
+            new_items = [
+                RestaurantMenuItem(restaurant_id=restaurant_id, product_id=product_id, availability=True)
+                for restaurant_id in restaurant_ids
+                for product_id in product_ids
+                if (restaurant_id, product_id) not in existing_pairs
+            ]
+            # A concurrent edit may have added some of the pairs already
+            RestaurantMenuItem.objects.bulk_create(new_items, ignore_conflicts=True)
+            changes.extend((item.restaurant_id, item.product_id, True) for item in new_items)
+
+        if changes:
+            # bulk_update and bulk_create send no signals, the menu read model is synced here
+            sync_menu_entries((restaurant_id, product_id) for restaurant_id, product_id, _ in changes)
+            transaction.on_commit(partial(apply_catalog_change, changes))
+    return len(changes)
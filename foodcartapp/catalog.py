@@ -0,0 +1,142 @@
+from operator import itemgetter
+
+from .availability import get_availability_index
+from .media import get_media_url_prefix
+from .models import Product, ProductCategory
+from .serializers import PRODUCT_LIST_FIELDS, dump_json, serialize_product_row
+
+
+PAGE_QUERY_PARAMS = {'category', 'special', 'limit', 'cursor'}
+PAGE_DEFAULT_LIMIT = 20
+PAGE_MAX_LIMIT = 100
+
+BOOLEAN_VALUES = {
+    '1': True,
+    'true': True,
+    '0': False,
+    'false': False,
+}
+
+
+class CatalogQueryError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _parse_positive_int(params, name, errors):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        errors[name] = 'Ожидалось целое положительное число.'
+        return None
+    return number
+
+
+def parse_product_page_query(params):
+    errors = {}
+    uncategorized = params.get('category') == 'none'
+    query = {
+        'category_id': None if uncategorized else _parse_positive_int(params, 'category', errors),
+        'uncategorized': uncategorized,
+        'special_status': None,
+        'cursor': _parse_positive_int(params, 'cursor', errors),
+        'limit': min(_parse_positive_int(params, 'limit', errors) or PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT),
+    }
+
+    special = params.get('special')
+    if special is not None:
+        query['special_status'] = BOOLEAN_VALUES.get(special.lower())
+        if query['special_status'] is None:
+            errors['special'] = 'Ожидалось 1 или 0.'
+
+    if errors:
+        raise CatalogQueryError(errors)
+    return query
+
+
+def get_product_page_queryset(category_id=None, uncategorized=False, special_status=None, cursor=None):
+    """Return product rows of a catalog page in id order, before the availability check."""
+    products = Product.objects.order_by('id')
+    if category_id is not None:
+        products = products.filter(category_id=category_id)
+    elif uncategorized:
+        products = products.filter(category__isnull=True)
+    if special_status is not None:
+        # An exact True renders as a bare "WHERE special_status", which SQLite can't match to an index
+        products = products.filter(special_status__in=[special_status])
+    if cursor is not None:
+        products = products.filter(id__gt=cursor)
+    return products.values(*PRODUCT_LIST_FIELDS)
+
+
+def get_product_page(category_id=None, uncategorized=False, special_status=None, cursor=None, limit=PAGE_DEFAULT_LIMIT):
+    """Return up to limit available products after the cursor, and the cursor of the next page.
+
+    The cursor is the id of the last product of the previous page. Rows come
+    from the (category, special_status, id) index already in id order, so
+    reading stops as soon as the page is full instead of sorting the whole
+    category.
+    """
+    products = get_product_page_queryset(category_id, uncategorized, special_status, cursor)
+
+    availability_index = get_availability_index()
+    rows = []
+    for row in products.iterator(chunk_size=limit + 1):
+        if not availability_index.is_available(row['id']):
+            continue
+        if len(rows) == limit:
+            return rows, rows[-1]['id']
+        rows.append(row)
+    return rows, None
+
+
+def dump_product_page_json(rows, next_cursor):
+    media_url_prefix = get_media_url_prefix()
+    return dump_json({
+        'products': [serialize_product_row(row, media_url_prefix) for row in rows],
+        'next_cursor': next_cursor,
+    }).encode()
+
+
+def get_category_summary():
+    """Return categories with the number of available products and special offers in each.
+
+    Products are counted over their (id, category, special) rows filtered by
+    the availability index, uncategorized ones last.
+    """
+    counts = {}
+    rows = Product.objects.values_list('id', 'category_id', 'special_status').iterator()
+    for _, category_id, special_status in get_availability_index().filter_available(rows, key=itemgetter(0)):
+        category_counts = counts.setdefault(category_id, [0, 0])
+        category_counts[0] += 1
+        category_counts[1] += special_status
+
+    category_names = dict(ProductCategory.objects.values_list('id', 'name'))
+    categories = [
+        {
+            'category_id': category_id,
+            'category__name': category_names.get(category_id),
+            'products_count': products_count,
+            'special_count': special_count,
+        }
+        for category_id, (products_count, special_count) in counts.items()
+    ]
+    return sorted(categories, key=lambda category: (category['category__name'] is None, category['category__name'] or ''))
+
+
+def dump_category_summary_json(categories):
+    return dump_json([
+        {
+            'id': category['category_id'],
+            'name': category['category__name'],
+            'products_count': category['products_count'],
+            'special_count': category['special_count'],
+        }
+        for category in categories
+    ]).encode()
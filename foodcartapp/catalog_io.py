@@ -0,0 +1,367 @@
+import csv
+import itertools
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlparse
+
+import requests
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from star_burger.storage import hashed_media_storage
+
+from .availability import apply_catalog_change
+from .models import Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .renditions import PRODUCT_RENDITIONS, generate_renditions
+from .restaurant_menus import rebuild_restaurant_menus
+from .search import rebuild_search_index
+
+
+FORMATS = ['csv', 'jsonl']
+
+# Entities in the order they are imported: later ones refer to earlier ones by name
+ENTITY_FIELDS = {
+    'categories': ['name'],
+    'restaurants': ['name', 'address', 'contact_phone'],
+    'products': ['name', 'category', 'price', 'special_status', 'description', 'image'],
+    'menu_items': ['restaurant', 'product', 'availability'],
+}
+
+PRODUCT_UPDATE_FIELDS = ['category_id', 'price', 'special_status', 'description', 'image']
+
+BATCH_SIZE = 1000
+IMAGE_TIMEOUT = 10
+
+BOOLEAN_VALUES = {
+    'true': True,
+    '1': True,
+    'false': False,
+    '0': False,
+    '': False,
+}
+
+
+class CatalogImportError(Exception):
+    pass
+
+
+def get_entity_path(directory, entity, file_format):
+    return os.path.join(directory, f'{entity}.{file_format}')
+
+
+def iter_batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_records(path, file_format):
+    """Yield (line number, record dict) from a CSV or JSONL file without reading it whole."""
+    with open(path, encoding='utf-8', newline='') as catalog_file:
+        if file_format == 'csv':
+            # The header is line 1
+            yield from enumerate(csv.DictReader(catalog_file), start=2)
+            return
+        for line_number, line in enumerate(catalog_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                raise CatalogImportError(f'{path}:{line_number}: не JSON: {error}')
+            if not isinstance(record, dict):
+                raise CatalogImportError(f'{path}:{line_number}: ожидался JSON-объект')
+            yield line_number, record
+
+
+def write_records(path, file_format, fields, rows):
+    """Write rows, tuples in the order of fields, and return their number."""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as catalog_file:
+        if file_format == 'csv':
+            writer = csv.writer(catalog_file)
+            writer.writerow(fields)
+            for row in rows:
+                writer.writerow(['' if value is None else value for value in row])
+                count += 1
+            return count
+        for row in rows:
+            catalog_file.write(json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder, ensure_ascii=False))
+            catalog_file.write('\n')
+            count += 1
+    return count
+
+
+def export_catalog(directory, file_format):
+    """Write every entity to its own file in the directory, return the number of rows by entity."""
+    querysets = {
+        'categories': ProductCategory.objects.order_by('id').values_list('name'),
+        'restaurants': Restaurant.objects.order_by('id').values_list('name', 'address', 'contact_phone'),
+        'products': (
+            Product.objects
+            .order_by('id')
+            .values_list('name', 'category__name', 'price', 'special_status', 'description', 'image')
+        ),
+        'menu_items': (
+            RestaurantMenuItem.objects
+            .order_by('id')
+            .values_list('restaurant__name', 'product__name', 'availability')
+        ),
+    }
+    os.makedirs(directory, exist_ok=True)
+    return {
+        entity: write_records(
+            get_entity_path(directory, entity, file_format),
+            file_format,
+            ENTITY_FIELDS[entity],
+            queryset.iterator(chunk_size=BATCH_SIZE),
+        )
+        for entity, queryset in querysets.items()
+    }
+
+
+class CatalogImporter:
+    """Upsert the catalog from a directory of CSV or JSONL files, one file per entity.
+
+    Files are read in batches, so memory does not grow with their size.
+    Rows are matched to existing ones by name: a known name is updated, an
+    unknown one is created. A renamed row is therefore imported as a new one
+    and the old row stays. Menu items are matched by restaurant and product.
+    Missing files are skipped. Created and changed rows are counted by entity
+    in created_counts and updated_counts.
+    """
+
+    def __init__(self, directory, file_format, images_dir=None, workers=8, batch_size=BATCH_SIZE, update_images=False):
+        self.directory = directory
+        self.file_format = file_format
+        self.images_dir = images_dir
+        self.workers = workers
+        self.batch_size = batch_size
+        self.update_images = update_images
+        self.category_ids = {}
+        self.restaurant_ids = {}
+        self.created_counts = Counter()
+        self.updated_counts = Counter()
+
+    def run(self):
+        """Import every file in one transaction, return the number of imported rows by entity."""
+        counts = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as self.image_pool:
+            with transaction.atomic():
+                self.category_ids = dict(ProductCategory.objects.values_list('name', 'id'))
+                self.restaurant_ids = dict(Restaurant.objects.values_list('name', 'id'))
+                for entity in ENTITY_FIELDS:
+                    path = get_entity_path(self.directory, entity, self.file_format)
+                    if not os.path.exists(path):
+                        continue
+                    import_batch = getattr(self, f'import_{entity}')
+                    counts[entity] = 0
+                    for batch in iter_batches(iter_records(path, self.file_format), self.batch_size):
+                        import_batch([(f'{path}:{line_number}', record) for line_number, record in batch])
+                        counts[entity] += len(batch)
+
+                # Bulk queries skip the signals that keep these in sync
+                rebuild_search_index()
+                rebuild_restaurant_menus()
+                transaction.on_commit(apply_catalog_change)
+        return counts
+
+    def import_categories(self, records):
+        new_names = {
+            self.get_name(location, record)
+            for location, record in records
+        } - self.category_ids.keys()
+        self.create_named(ProductCategory, new_names, self.category_ids)
+        self.created_counts['categories'] += len(new_names)
+
+    def import_restaurants(self, records):
+        restaurants = {}
+        for location, record in records:
+            name = self.get_name(location, record)
+            restaurants[name] = Restaurant(
+                id=self.restaurant_ids.get(name),
+                name=name,
+                address=record.get('address') or '',
+                contact_phone=record.get('contact_phone') or '',
+            )
+        saved_contacts = {
+            name: (address, contact_phone)
+            for name, address, contact_phone in (
+                Restaurant.objects
+                .filter(name__in=restaurants.keys())
+                .values_list('name', 'address', 'contact_phone')
+            )
+        }
+        changed_restaurants = [
+            restaurant for name, restaurant in restaurants.items()
+            if restaurant.id and saved_contacts.get(name) != (restaurant.address, restaurant.contact_phone)
+        ]
+        Restaurant.objects.bulk_update(changed_restaurants, ['address', 'contact_phone'])
+        new_restaurants = [restaurant for restaurant in restaurants.values() if not restaurant.id]
+        Restaurant.objects.bulk_create(new_restaurants)
+        self.updated_counts['restaurants'] += len(changed_restaurants)
+        self.created_counts['restaurants'] += len(new_restaurants)
+        # SQLite does not return ids from bulk_create on Django 3.2
+        self.restaurant_ids.update(
+            Restaurant.objects
+            .filter(name__in=[restaurant.name for restaurant in new_restaurants])
+            .values_list('name', 'id')
+        )
+
+    def import_products(self, records):
+        products = {}
+        for location, record in records:
+            name = self.get_name(location, record)
+            products[name] = (location, record)
+
+        existing_products = {
+            row['name']: row
+            for row in (
+                Product.objects
+                .filter(name__in=products.keys())
+                .values('name', 'id', *PRODUCT_UPDATE_FIELDS)
+            )
+        }
+
+        category_names = {record.get('category') for _, record in products.values()} - {None, ''}
+        new_category_names = category_names - self.category_ids.keys()
+        self.create_named(ProductCategory, new_category_names, self.category_ids)
+        self.created_counts['categories'] += len(new_category_names)
+
+        # Images are downloaded and resized while the rows of the batch are built
+        image_sources = {}
+        for name, (location, record) in products.items():
+            image = existing_products.get(name, {}).get('image')
+            if record.get('image') and (self.update_images or not image):
+                image_sources[name] = (location, record['image'])
+        image_names = self.image_pool.map(self.fetch_image, image_sources.values())
+
+        fetched_images = dict(zip(image_sources.keys(), image_names))
+
+        new_products = []
+        changed_products = []
+        for name, (location, record) in products.items():
+            existing_product = existing_products.get(name, {})
+            values = {
+                'category_id': self.category_ids.get(record.get('category')),
+                'price': self.get_decimal(location, record, 'price'),
+                'special_status': self.get_bool(location, record, 'special_status'),
+                'description': record.get('description') or '',
+                'image': fetched_images.get(name, existing_product.get('image', '')),
+            }
+            if not existing_product:
+                new_products.append(Product(name=name, **values))
+            # bulk_update builds a CASE per field and row, unchanged rows are not worth it
+            elif any(existing_product[field] != value for field, value in values.items()):
+                changed_products.append(Product(id=existing_product['id'], name=name, **values))
+
+        Product.objects.bulk_update(changed_products, PRODUCT_UPDATE_FIELDS)
+        Product.objects.bulk_create(new_products)
+        self.updated_counts['products'] += len(changed_products)
+        self.created_counts['products'] += len(new_products)
+
+    def import_menu_items(self, records):
+        product_names = {record.get('product') for _, record in records}
+        product_ids = dict(Product.objects.filter(name__in=product_names).values_list('name', 'id'))
+
+        availability = {}
+        for location, record in records:
+            restaurant_id = self.restaurant_ids.get(record.get('restaurant'))
+            if restaurant_id is None:
+                raise CatalogImportError(f'{location}: нет ресторана «{record.get("restaurant")}»')
+            product_id = product_ids.get(record.get('product'))
+            if product_id is None:
+                raise CatalogImportError(f'{location}: нет товара «{record.get("product")}»')
+            availability[restaurant_id, product_id] = self.get_bool(location, record, 'availability', default=True)
+
+        menu_items = (
+            RestaurantMenuItem.objects
+            .filter(
+                restaurant_id__in={restaurant_id for restaurant_id, _ in availability},
+                product_id__in={product_id for _, product_id in availability},
+            )
+            .values_list('id', 'restaurant_id', 'product_id', 'availability')
+        )
+        changed_item_ids = {True: [], False: []}
+        for item_id, restaurant_id, product_id, item_availability in menu_items:
+            pair = (restaurant_id, product_id)
+            if pair not in availability:
+                continue
+            available = availability.pop(pair)
+            if item_availability != available:
+                changed_item_ids[available].append(item_id)
+        # Two plain UPDATEs instead of a bulk_update CASE over every changed row
+        for available, item_ids in changed_item_ids.items():
+            if item_ids:
+                RestaurantMenuItem.objects.filter(id__in=item_ids).update(availability=available)
+                self.updated_counts['menu_items'] += len(item_ids)
+        RestaurantMenuItem.objects.bulk_create(
+            [
+                RestaurantMenuItem(restaurant_id=restaurant_id, product_id=product_id, availability=available)
+                for (restaurant_id, product_id), available in availability.items()
+            ],
+            ignore_conflicts=True,
+        )
+        self.created_counts['menu_items'] += len(availability)
+
+    def create_named(self, model, names, ids_by_name):
+        if not names:
+            return
+        model.objects.bulk_create(model(name=name) for name in names)
+        ids_by_name.update(model.objects.filter(name__in=names).values_list('name', 'id'))
+
+    def fetch_image(self, source):
+        """Save the image from a URL, a file in images_dir or the media storage, return its name."""
+        location, image = source
+        url = urlparse(image)
+        try:
+            if url.scheme in {'http', 'https'}:
+                response = requests.get(image, timeout=IMAGE_TIMEOUT)
+                response.raise_for_status()
+                name = hashed_media_storage.save(os.path.basename(url.path) or 'image.jpg', ContentFile(response.content))
+            elif hashed_media_storage.exists(image):
+                # Already in media, e.g. the file came from export_catalog
+                return image
+            else:
+                with open(os.path.join(self.images_dir or '', image), 'rb') as image_file:
+                    name = hashed_media_storage.save(os.path.basename(image), File(image_file))
+            generate_renditions(name, PRODUCT_RENDITIONS)
+        except (OSError, ValueError, requests.RequestException) as error:
+            raise CatalogImportError(f'{location}: не удалось загрузить картинку {image}: {error}')
+        return name
+
+    def get_name(self, location, record):
+        name = (record.get('name') or '').strip()
+        if not name:
+            raise CatalogImportError(f'{location}: не указано название')
+        return name
+
+    def get_decimal(self, location, record, field):
+        value = record.get(field)
+        try:
+            number = Decimal(str(value))
+        except InvalidOperation:
+            number = None
+        # Decimal also parses NaN and Infinity, a database would reject them only at the end
+        if number is None or not number.is_finite() or number < 0:
+            raise CatalogImportError(f'{location}: {field} должно быть неотрицательным числом, а не {value!r}')
+        return number
+
+    def get_bool(self, location, record, field, default=False):
+        value = record.get(field)
+        if value is None:
+            return default
+        if isinstance(value, bool):
+            return value
+        boolean = BOOLEAN_VALUES.get(str(value).strip().lower())
+        if boolean is None:
+            raise CatalogImportError(f'{location}: {field} должно быть true или false, а не {value!r}')
+        return boolean
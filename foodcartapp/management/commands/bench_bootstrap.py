@@ -0,0 +1,35 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = 'Измеряет, сколько времени занимает создание тестовой базы с миграциями и демо-каталогом'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--extra-products', type=int, default=0)
+
+    def handle(self, *args, **options):
+        old_database_name = connection.settings_dict['NAME']
+
+        started_at = time.perf_counter()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        migrated_at = time.perf_counter()
+        try:
+            call_command(
+                'load_demo_catalog',
+                extra_products=options['extra_products'],
+                no_images=True,
+                stdout=self.stdout,
+            )
+            loaded_at = time.perf_counter()
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+        self.stdout.write(
+            f'Тестовая база: миграции {migrated_at - started_at:.2f} с, '
+            f'демо-каталог {loaded_at - migrated_at:.2f} с, '
+            f'всего {loaded_at - started_at:.2f} с'
+        )
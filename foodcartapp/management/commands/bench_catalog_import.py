@@ -0,0 +1,83 @@
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from foodcartapp.catalog_io import ENTITY_FIELDS, FORMATS, CatalogImporter, export_catalog, get_entity_path, write_records
+
+
+class Command(BaseCommand):
+    help = 'Измеряет импорт и экспорт каталога на тестовой базе: 25000 товаров в 4 ресторанах дают 100000 пунктов меню'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=25000)
+        parser.add_argument('--restaurants', type=int, default=4)
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--trace-memory', action='store_true', help='Показать пик памяти Python (замедляет замер)')
+
+    def handle(self, *args, **options):
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                self.run_benchmark(directory, options)
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    def write_catalog(self, directory, options, available_share):
+        file_format = options['format']
+        random.seed(0)
+        restaurants = [f'Ресторан {number}' for number in range(options['restaurants'])]
+        categories = [f'Категория {number}' for number in range(10)]
+        products = (
+            (f'Товар {number}', random.choice(categories), random.randint(50, 500), number % 10 == 0, 'Описание', '')
+            for number in range(options['products'])
+        )
+        menu_items = (
+            (restaurant, f'Товар {number}', random.random() < available_share)
+            for number in range(options['products'])
+            for restaurant in restaurants
+        )
+        write_records(get_entity_path(directory, 'categories', file_format), file_format, ENTITY_FIELDS['categories'], ((name,) for name in categories))
+        write_records(
+            get_entity_path(directory, 'restaurants', file_format),
+            file_format,
+            ENTITY_FIELDS['restaurants'],
+            ((name, f'Москва, ул. Тверская, {number}', '') for number, name in enumerate(restaurants)),
+        )
+        write_records(get_entity_path(directory, 'products', file_format), file_format, ENTITY_FIELDS['products'], products)
+        return write_records(get_entity_path(directory, 'menu_items', file_format), file_format, ENTITY_FIELDS['menu_items'], menu_items)
+
+    def measure(self, title, function, options):
+        if options['trace_memory']:
+            tracemalloc.start()
+        started_at = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - started_at
+        memory = ''
+        if options['trace_memory']:
+            memory = f', пик памяти {tracemalloc.get_traced_memory()[1] / 1024 / 1024:.1f} МБ'
+            tracemalloc.stop()
+        self.stdout.write(f'{title}: {seconds:.2f} с{memory}')
+        return result
+
+    def run_benchmark(self, directory, options):
+        import_directory = os.path.join(directory, 'import')
+        os.makedirs(import_directory)
+        menu_items_count = self.write_catalog(import_directory, options, available_share=0.9)
+        self.stdout.write(f'Пунктов меню в файле: {menu_items_count}')
+
+        importer = CatalogImporter(import_directory, options['format'])
+        self.measure('Импорт в пустую базу', importer.run, options)
+
+        # The same file with other availability: every row is an update now
+        self.write_catalog(import_directory, options, available_share=0.5)
+        importer = CatalogImporter(import_directory, options['format'])
+        self.measure('Повторный импорт с изменениями', importer.run, options)
+
+        export_directory = os.path.join(directory, 'export')
+        self.measure('Экспорт', lambda: export_catalog(export_directory, options['format']), options)
@@ -0,0 +1,99 @@
+import json
+import random
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from foodcartapp.models import Order, Product
+from foodcartapp.views import register_order
+
+
+BENCHMARK_LASTNAME = 'bench-order-intake'
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест приёма заказов: задержка p50/p99 и число SQL-запросов на заказ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--items', type=int, default=30, help='Товаров в одном заказе')
+        parser.add_argument('--keep', action='store_true', help='Не удалять созданные заказы')
+        parser.add_argument(
+            '--queue',
+            action='store_true',
+            help='Принимать заказы через очередь (во временный файл), а не сразу в базу',
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as queue_dir:
+            queue_settings = override_settings(
+                ORDER_QUEUE_ENABLED=options['queue'],
+                ORDER_QUEUE_PATH=os.path.join(queue_dir, 'order_queue.sqlite3'),
+            )
+            with queue_settings:
+                self.run_benchmark(options)
+
+    def run_benchmark(self, options):
+        product_ids = list(Product.objects.values_list('pk', flat=True))
+        if not product_ids:
+            raise CommandError('В базе нет товаров, заказывать нечего.')
+
+        factory = RequestFactory()
+        random.seed(0)
+        bodies = [
+            json.dumps({
+                'products': [
+                    {'product': random.choice(product_ids), 'quantity': random.randint(1, 5)}
+                    for _ in range(options['items'])
+                ],
+                'firstname': 'Иван',
+                'lastname': BENCHMARK_LASTNAME,
+                'phonenumber': '+79001234567',
+                'address': 'Москва, ул. Тверская, 1',
+            })
+            for _ in range(options['orders'])
+        ]
+
+        def place_order(body):
+            request = factory.post('/api/order/', body, content_type='application/json')
+            started_at = time.perf_counter()
+            response = register_order(request)
+            latency = time.perf_counter() - started_at
+            return response.status_code, latency
+
+        def place_order_in_thread(body):
+            try:
+                return place_order(body)
+            finally:
+                connections.close_all()
+
+        with CaptureQueriesContext(connection) as queries:
+            status_code, _ = place_order(bodies[0])
+        if status_code != 201:
+            raise CommandError(f'Тестовый заказ не принят, код ответа {status_code}.')
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(place_order_in_thread, bodies[1:]))
+        elapsed = time.perf_counter() - started_at
+
+        latencies = [latency * 1000 for status_code, latency in results if status_code == 201]
+        failed = len(results) - len(latencies)
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+
+        self.stdout.write(f'Заказов: {len(results)}, потоков: {options["concurrency"]}, товаров в заказе: {options["items"]}')
+        self.stdout.write(f'Ошибок: {failed}')
+        self.stdout.write(f'Пропускная способность: {len(latencies) / elapsed:.1f} заказов/с')
+        self.stdout.write(f'p50: {percentiles[49]:.1f} мс, p99: {percentiles[98]:.1f} мс')
+        self.stdout.write(f'SQL-запросов на заказ: {len(queries)}')
+
+        if not options['keep']:
+            Order.objects.filter(lastname=BENCHMARK_LASTNAME).delete()
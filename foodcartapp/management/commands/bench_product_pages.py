@@ -0,0 +1,62 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from foodcartapp.models import ProductCategory
+
+
+def measure(client, path, params, requests_count):
+    started_at = time.perf_counter()
+    for _ in range(requests_count):
+        response = client.get(path, params)
+        if response.status_code != 200:
+            # An error page is small and fast, timing it would flatter the catalog
+            raise CommandError(f'Запрос {path} {params} не выполнен, код ответа {response.status_code}.')
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+    return (time.perf_counter() - started_at) / requests_count, len(content)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает первую страницу каталога со всем списком товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--extra-products', type=int, default=50000)
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            call_command(
+                'load_demo_catalog',
+                extra_products=options['extra_products'],
+                no_images=True,
+                stdout=self.stdout,
+            )
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    def run_benchmark(self, options):
+        client = Client()
+        category_id = ProductCategory.objects.values_list('id', flat=True).first()
+        scenarios = [
+            ('весь список', '/api/products/', {}),
+            ('категории', '/api/categories/', {}),
+            ('первая страница категории', '/api/products/', {'category': category_id, 'limit': options['limit']}),
+            ('спецпредложения', '/api/products/', {'special': 1, 'limit': options['limit']}),
+            ('вторая страница', '/api/products/', {'category': category_id, 'limit': options['limit'], 'cursor': 1}),
+        ]
+        for title, path, params in scenarios:
+            cold_seconds, size = measure(client, path, params, 1)
+            seconds, _ = measure(client, path, params, options['requests'])
+            self.stdout.write(
+                f'{title}: {size / 1024:.1f} КБ, первый запрос {cold_seconds * 1000:.1f} мс, '
+                f'повторные {seconds * 1000:.2f} мс'
+            )
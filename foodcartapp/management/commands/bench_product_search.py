@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from foodcartapp.models import Product
+from foodcartapp.search import PrefixTrie, search_product_ids, split_words
+
+
+QUERIES = ['чиз', 'бургер', 'ролл', 'кола', 'ролл кур', 'картофель фри', 'молочный', 'двойной']
+
+
+def percentile(latencies, fraction):
+    return sorted(latencies)[int(len(latencies) * fraction)]
+
+
+def format_latencies(latencies):
+    return (
+        f'p50 {percentile(latencies, 0.5) * 1000:.2f} мс, '
+        f'p95 {percentile(latencies, 0.95) * 1000:.2f} мс'
+    )
+
+
+def measure(function, queries):
+    latencies = []
+    for query in queries:
+        started_at = time.perf_counter()
+        function(query)
+        latencies.append(time.perf_counter() - started_at)
+    return latencies
+
+
+def scan_product_ids(query, limit):
+    # What the admin did before the index: a LIKE scan over the whole table
+    condition = Q()
+    for word in split_words(query):
+        condition &= Q(name__icontains=word) | Q(description__icontains=word) | Q(category__name__icontains=word)
+    return list(Product.objects.filter(condition).values_list('id', flat=True)[:limit])
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск по индексу и автодополнение с поиском через LIKE на тестовой базе'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--extra-products', type=int, default=50000)
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            call_command(
+                'load_demo_catalog',
+                extra_products=options['extra_products'],
+                no_images=True,
+                stdout=self.stdout,
+            )
+            self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+
+    def run_benchmark(self, options):
+        random.seed(0)
+        queries = [random.choice(QUERIES) for _ in range(options['requests'])]
+        prefixes = [query[:random.randint(1, len(query))] for query in queries]
+        limit = options['limit']
+
+        started_at = time.perf_counter()
+        trie = PrefixTrie.load()
+        trie_seconds = time.perf_counter() - started_at
+
+        # The first search builds the availability index
+        search_product_ids(queries[0])
+        index_latencies = measure(lambda query: search_product_ids(query, limit=limit), queries)
+        scan_latencies = measure(lambda query: scan_product_ids(query, limit), queries)
+        complete_latencies = measure(lambda prefix: trie.complete(prefix), prefixes)
+
+        self.stdout.write(f'Поиск по индексу: {format_latencies(index_latencies)}')
+        self.stdout.write(f'Поиск через LIKE: {format_latencies(scan_latencies)}')
+        self.stdout.write(
+            f'Автодополнение: {format_latencies(complete_latencies)}, '
+            f'дерево строится за {trie_seconds:.2f} с, '
+            f'в среднем {statistics.mean(complete_latencies) * 1000:.3f} мс'
+        )
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from star_burger.sqlite_tuned.base import PRAGMAS
+
+
+SCHEMA = [
+    'CREATE TABLE orders (id INTEGER PRIMARY KEY, address TEXT NOT NULL, created_at REAL NOT NULL)',
+    '''
+    CREATE TABLE order_items (
+        id INTEGER PRIMARY KEY,
+        order_id INTEGER NOT NULL REFERENCES orders (id),
+        product_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        price TEXT NOT NULL
+    )
+    ''',
+    'CREATE INDEX order_items_order_id ON order_items (order_id)',
+]
+
+MODES = {
+    # What the stock Django backend does: rollback journal, deferred BEGIN
+    'обычный': {'pragmas': [], 'begin': 'BEGIN'},
+    'производительный': {'pragmas': PRAGMAS, 'begin': 'BEGIN IMMEDIATE'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает конкурентную запись заказов в SQLite в обычном и производительном режиме'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--orders', type=int, default=200, help='Заказов на один пишущий поток')
+        parser.add_argument('--items', type=int, default=30)
+
+    def handle(self, *args, **options):
+        for mode_name, mode in MODES.items():
+            with tempfile.TemporaryDirectory() as database_dir:
+                path = os.path.join(database_dir, 'bench.sqlite3')
+                result = self.run_mode(path, mode, options)
+            self.stdout.write(
+                f'{mode_name}: {result["orders_per_second"]:.0f} заказов/с, '
+                f'ошибок «database is locked»: {result["errors"]}, '
+                f'чтений: {result["reads"]}'
+            )
+
+    def connect(self, path, mode):
+        connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        for pragma in mode['pragmas']:
+            connection.execute(f'PRAGMA {pragma}')
+        return connection
+
+    def run_mode(self, path, mode, options):
+        connection = self.connect(path, mode)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.close()
+
+        errors = []
+        reads = []
+        writers_done = threading.Event()
+
+        def write_orders():
+            connection = self.connect(path, mode)
+            failed = 0
+            for _ in range(options['orders']):
+                try:
+                    connection.execute(mode['begin'])
+                    # Like create_orders(): read inside the transaction first,
+                    # then write, which needs a lock upgrade in deferred mode
+                    connection.execute('SELECT COUNT(*) FROM orders WHERE address = ?', ('',)).fetchone()
+                    cursor = connection.execute(
+                        'INSERT INTO orders (address, created_at) VALUES (?, ?)',
+                        ('Москва, ул. Тверская, 1', time.time()),
+                    )
+                    connection.executemany(
+                        'INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)',
+                        [(cursor.lastrowid, item, 1, '100.00') for item in range(options['items'])],
+                    )
+                    connection.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    failed += 1
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+            connection.close()
+            errors.append(failed)
+
+        def read_orders():
+            connection = self.connect(path, mode)
+            count = 0
+            while not writers_done.is_set():
+                try:
+                    connection.execute(
+                        'SELECT o.id, SUM(i.quantity * i.price) FROM orders o '
+                        'JOIN order_items i ON i.order_id = o.id '
+                        'GROUP BY o.id ORDER BY o.id DESC LIMIT 50'
+                    ).fetchall()
+                    count += 1
+                except sqlite3.OperationalError:
+                    pass
+            connection.close()
+            reads.append(count)
+
+        readers = [threading.Thread(target=read_orders) for _ in range(options['readers'])]
+        writers = [threading.Thread(target=write_orders) for _ in range(options['writers'])]
+        for reader in readers:
+            reader.start()
+
+        started_at = time.perf_counter()
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        elapsed = time.perf_counter() - started_at
+
+        writers_done.set()
+        for reader in readers:
+            reader.join()
+
+        written = options['writers'] * options['orders'] - sum(errors)
+        return {
+            'orders_per_second': written / elapsed,
+            'errors': sum(errors),
+            'reads': sum(reads),
+        }
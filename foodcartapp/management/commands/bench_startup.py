@@ -0,0 +1,116 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+PROFILES = {
+    'dev': {'DEBUG': 'True'},
+    'prod': {'DEBUG': 'False'},
+}
+
+# Runs in a fresh interpreter, so imports and setup are measured cold
+CHILD_SCRIPT = '''
+import json
+import sys
+import time
+
+started_at = time.perf_counter()
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+setup_seconds = time.perf_counter() - started_at
+
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import resolve
+
+path, requests_count = sys.argv[1], int(sys.argv[2])
+host = next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+factory = RequestFactory(HTTP_HOST=host)
+
+
+def start_response(status, headers, exc_info=None):
+    start_response.status = status
+
+
+def run_application():
+    environ = factory._base_environ(PATH_INFO=path, REQUEST_METHOD='GET')
+    response = application(environ, start_response)
+    b''.join(response)
+    response.close()
+
+
+def run_view():
+    match = resolve(path)
+    request = factory.get(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.streaming:
+        b''.join(response.streaming_content)
+
+
+# The first requests warm up caches, templates and database connections
+for _ in range(5):
+    run_application()
+    run_view()
+
+started_at = time.perf_counter()
+for _ in range(requests_count):
+    run_application()
+request_seconds = (time.perf_counter() - started_at) / requests_count
+
+started_at = time.perf_counter()
+for _ in range(requests_count):
+    run_view()
+view_seconds = (time.perf_counter() - started_at) / requests_count
+
+print(json.dumps({
+    'setup_seconds': setup_seconds,
+    'request_seconds': request_seconds,
+    'view_seconds': view_seconds,
+    'status': start_response.status,
+    'modules': len(sys.modules),
+    'middleware': len(settings.MIDDLEWARE),
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Измеряет время запуска и накладные расходы middleware на запрос в профилях dev и prod'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/banners/', help='Адрес, который запрашивать')
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for profile_name, profile_env in PROFILES.items():
+            result = self.run_profile(profile_env, options)
+            middleware_seconds = result['request_seconds'] - result['view_seconds']
+            self.stdout.write(
+                f'{profile_name}: импорт и setup {result["setup_seconds"] * 1000:.0f} мс, '
+                f'модулей {result["modules"]}; '
+                f'запрос {result["request_seconds"] * 1000:.2f} мс ({result["status"]}), '
+                f'из них middleware ({result["middleware"]} шт.) {middleware_seconds * 1000:.2f} мс'
+            )
+
+    def run_profile(self, profile_env, options):
+        env = {
+            **os.environ,
+            **profile_env,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'star_burger.settings'),
+        }
+        completed = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, options['path'], str(options['requests'])],
+            env=env,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(completed.stdout.strip().splitlines()[-1])
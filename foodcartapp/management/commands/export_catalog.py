@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.catalog_io import FORMATS, export_catalog
+
+
+class Command(BaseCommand):
+    help = 'Выгружает категории, рестораны, товары и наличие в ресторанах в папку, в формате для import_catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Папка, куда записать файлы каталога')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        counts = export_catalog(options['directory'], options['format'])
+        self.stdout.write(
+            ', '.join(f'{entity}: {count}' for entity, count in counts.items())
+            + f', {time.perf_counter() - started_at:.2f} с'
+        )
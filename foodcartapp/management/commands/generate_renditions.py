@@ -0,0 +1,55 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from foodcartapp.models import Banner, Product
+from foodcartapp.renditions import BANNER_RENDITIONS, PRODUCT_RENDITIONS, generate_renditions
+
+
+def generate_image_renditions(task):
+    image_name, renditions, overwrite = task
+    try:
+        return image_name, generate_renditions(image_name, renditions, overwrite=overwrite), None
+    except (OSError, ValueError) as error:
+        return image_name, 0, str(error)
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии картинок товаров и баннеров, которых ещё нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Число процессов')
+        parser.add_argument('--overwrite', action='store_true', help='Пересоздать уже существующие копии')
+
+    def handle(self, *args, **options):
+        tasks = []
+        for model, renditions in [(Product, PRODUCT_RENDITIONS), (Banner, BANNER_RENDITIONS)]:
+            image_names = sorted(set(
+                model.objects
+                .exclude(image='')
+                .values_list('image', flat=True)
+            ))
+            tasks.extend((image_name, renditions, options['overwrite']) for image_name in image_names)
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+
+        started_at = time.monotonic()
+        written_count = 0
+        failed_images = []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            results = executor.map(generate_image_renditions, tasks, chunksize=8)
+            for image_name, count, error in results:
+                written_count += count
+                if error:
+                    failed_images.append((image_name, error))
+
+        self.stdout.write(
+            f'Картинок: {len(tasks)}, создано копий: {written_count}, '
+            f'ошибок: {len(failed_images)}, {time.monotonic() - started_at:.1f} с'
+        )
+        for image_name, error in failed_images:
+            self.stdout.write(f'  {image_name}: {error}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from foodcartapp.models import Order
+from places.coordinates import fetch_coordinates
+from places.geocoders import get_geocoder
+
+
+class Command(BaseCommand):
+    help = 'Получает координаты адресов необработанных заказов, чтобы страница заказов показала расстояния'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        if get_geocoder() is None:
+            raise CommandError('Геокодер не настроен, укажите GEOCODER_BACKEND')
+
+        addresses = sorted(set(
+            Order.objects
+            .filter(status=Order.UNPROCESSED)
+            .values_list('address', flat=True)
+        ))
+
+        # Addresses already in the cache cost nothing, only new ones reach the geocoder
+        coordinates = {}
+        batch_size = options['batch_size']
+        for start in range(0, len(addresses), batch_size):
+            coordinates.update(fetch_coordinates(addresses[start:start + batch_size]))
+        unresolved_addresses = [address for address in addresses if not coordinates.get(address)]
+
+        self.stdout.write(f'Адресов: {len(addresses)}, не найдено: {len(unresolved_addresses)}')
+        for address in unresolved_addresses:
+            self.stdout.write(f'  {address}')
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from foodcartapp.models import Restaurant
+from places.coordinates import fetch_coordinates
+from places.geocoders import get_geocoder
+
+
+class Command(BaseCommand):
+    help = 'Получает координаты адресов всех ресторанов и сохраняет их в ресторанах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--refresh', action='store_true', help='Запросить координаты заново, даже если они в кэше')
+
+    def handle(self, *args, **options):
+        if get_geocoder() is None:
+            raise CommandError('Геокодер не настроен, укажите GEOCODER_BACKEND')
+
+        restaurants = list(Restaurant.objects.only('address', 'lat', 'lon'))
+        addresses = sorted({restaurant.address for restaurant in restaurants if restaurant.address})
+
+        coordinates = {}
+        batch_size = options['batch_size']
+        for start in range(0, len(addresses), batch_size):
+            coordinates.update(
+                fetch_coordinates(addresses[start:start + batch_size], refresh=options['refresh'])
+            )
+        unresolved_addresses = [address for address in addresses if not coordinates.get(address)]
+
+        changed_restaurants = []
+        for restaurant in restaurants:
+            restaurant_coordinates = coordinates.get(restaurant.address)
+            if restaurant.coordinates != restaurant_coordinates:
+                restaurant.lat, restaurant.lon = restaurant_coordinates or (None, None)
+                changed_restaurants.append(restaurant)
+        Restaurant.objects.bulk_update(changed_restaurants, ['lat', 'lon'])
+
+        self.stdout.write(
+            f'Адресов: {len(addresses)}, не найдено: {len(unresolved_addresses)}, '
+            f'обновлено ресторанов: {len(changed_restaurants)}'
+        )
+        for address in unresolved_addresses:
+            self.stdout.write(f'  {address}')
@@ -0,0 +1,53 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from foodcartapp.catalog_io import BATCH_SIZE, ENTITY_FIELDS, FORMATS, CatalogImporter, CatalogImportError
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает категории, рестораны, товары и наличие в ресторанах из папки с файлами '
+        'categories, restaurants, products и menu_items в формате CSV или JSONL. '
+        'Существующие записи с тем же названием обновляются, переименованные создаются заново'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Папка с файлами каталога')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--images-dir', help='Папка, относительно которой искать картинки товаров')
+        parser.add_argument('--update-images', action='store_true', help='Загрузить картинки и для товаров, у которых они уже есть')
+        parser.add_argument('--workers', type=int, default=8, help='Сколько картинок загружать одновременно')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options['directory']):
+            raise CommandError(f'Нет папки {options["directory"]}')
+
+        started_at = time.perf_counter()
+        importer = CatalogImporter(
+            options['directory'],
+            options['format'],
+            images_dir=options['images_dir'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            update_images=options['update_images'],
+        )
+        try:
+            counts = importer.run()
+        except CatalogImportError as error:
+            raise CommandError(str(error))
+
+        if not counts:
+            raise CommandError(f'В папке нет ни одного из файлов: {", ".join(ENTITY_FIELDS)} (.{options["format"]})')
+        self.stdout.write(
+            ', '.join(
+                f'{entity}: {count} (новых {importer.created_counts[entity]}, '
+                f'изменено {importer.updated_counts[entity]})'
+                for entity, count in counts.items()
+            )
+            + f', {time.perf_counter() - started_at:.2f} с'
+        )
+        if counts.get('restaurants'):
+            self.stdout.write('Координаты ресторанов по адресам обновит python manage.py geocode_restaurants')
@@ -0,0 +1,115 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from foodcartapp.availability import apply_catalog_change
+from foodcartapp.models import Banner, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from foodcartapp.renditions import BANNER_RENDITIONS, PRODUCT_RENDITIONS, generate_renditions
+from foodcartapp.restaurant_menus import rebuild_restaurant_menus
+from foodcartapp.search import rebuild_search_index
+from star_burger.storage import hashed_media_storage
+
+
+DEMO_CATALOG_PATH = os.path.join(settings.BASE_DIR, 'foodcartapp', 'demo_catalog.json')
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Заполняет пустую базу демонстрационным каталогом: категориями, товарами, ресторанами, их меню и баннерами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--extra-products', type=int, default=0, help='Добавить столько копий товаров, для нагрузочных тестов')
+        parser.add_argument('--no-images', action='store_true', help='Не копировать картинки в media и не создавать баннеры')
+
+    def handle(self, *args, **options):
+        if Product.objects.exists() or Restaurant.objects.exists():
+            raise CommandError('Каталог уже заполнен, демо-данные загружаются только в пустую базу')
+
+        started_at = time.perf_counter()
+        with open(DEMO_CATALOG_PATH, encoding='utf-8') as catalog_file:
+            catalog = json.load(catalog_file)
+
+        image_names = [''] * len(catalog['images'])
+        if not options['no_images']:
+            image_names = [self.save_image(filename) for filename in catalog['images']]
+
+        with transaction.atomic():
+            products_count, menu_items_count = self.load(catalog, image_names, options['extra_products'])
+            if not options['no_images']:
+                # A banner without a picture has nothing to show
+                Banner.objects.bulk_create(
+                    Banner(title=title, text=text, image=image_names[image_index], order=order)
+                    for order, (title, text, image_index) in enumerate(catalog['banners'])
+                )
+            # bulk_create skips the signals that keep the search index and menus in sync
+            rebuild_search_index()
+            rebuild_restaurant_menus()
+            transaction.on_commit(apply_catalog_change)
+
+        self.stdout.write(
+            f'Товаров: {products_count}, ресторанов: {len(catalog["restaurants"])}, '
+            f'пунктов меню: {menu_items_count}, {time.perf_counter() - started_at:.2f} с'
+        )
+
+    def save_image(self, filename):
+        with open(os.path.join(settings.BASE_DIR, 'assets', filename), 'rb') as image_file:
+            # The storage names files by content, a second load reuses them
+            name = hashed_media_storage.save(filename, File(image_file))
+        # The same pictures illustrate products and banners
+        generate_renditions(name, PRODUCT_RENDITIONS + BANNER_RENDITIONS)
+        return name
+
+    def load(self, catalog, image_names, extra_products_count):
+        ProductCategory.objects.bulk_create(
+            ProductCategory(name=name) for name in catalog['categories']
+        )
+        # SQLite does not return ids from bulk_create on Django 3.2
+        category_ids_by_name = dict(
+            ProductCategory.objects
+            .filter(name__in=catalog['categories'])
+            .values_list('name', 'id')
+        )
+        category_ids = [category_ids_by_name[name] for name in catalog['categories']]
+
+        Restaurant.objects.bulk_create(
+            Restaurant(name=name, address=address, contact_phone=phone, lat=lat, lon=lon)
+            for name, address, phone, lat, lon in catalog['restaurants']
+        )
+
+        products = []
+        for number in range(len(catalog['products']) + extra_products_count):
+            copy_number, product_index = divmod(number, len(catalog['products']))
+            name, category_index, price, special_status, description, image_index = catalog['products'][product_index]
+            products.append(Product(
+                name=f'{name} №{copy_number}' if copy_number else name,
+                category_id=category_ids[category_index],
+                price=price,
+                special_status=special_status,
+                description=description,
+                image=image_names[image_index],
+            ))
+        Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+
+        restaurant_ids = list(Restaurant.objects.values_list('id', flat=True))
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        menu_items = []
+        menu_items_count = 0
+        for product_id in product_ids:
+            menu_items.extend(
+                RestaurantMenuItem(restaurant_id=restaurant_id, product_id=product_id)
+                for restaurant_id in restaurant_ids
+            )
+            if len(menu_items) >= BATCH_SIZE:
+                RestaurantMenuItem.objects.bulk_create(menu_items)
+                menu_items_count += len(menu_items)
+                menu_items = []
+        RestaurantMenuItem.objects.bulk_create(menu_items)
+        menu_items_count += len(menu_items)
+
+        return len(products), menu_items_count
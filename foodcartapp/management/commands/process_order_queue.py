@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, close_old_connections
+
+from foodcartapp.order_queue import get_order_queue
+from foodcartapp.orders import create_orders
+from places.coordinates import fetch_coordinates
+
+
+class Command(BaseCommand):
+    help = 'Переносит принятые заказы из очереди в базу данных пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--interval', type=float, default=1.0, help='Пауза между опросами пустой очереди, сек.')
+        parser.add_argument('--once', action='store_true', help='Разобрать очередь и завершиться')
+        parser.add_argument('--stats', action='store_true', help='Показать длину очереди и отставание и завершиться')
+        parser.add_argument('--failed', action='store_true', help='Показать последние незаписанные заказы и завершиться')
+        parser.add_argument(
+            '--purge-after',
+            type=float,
+            default=7 * 24 * 60 * 60,
+            help='Через сколько секунд удалять из очереди обработанные заказы',
+        )
+
+    def handle(self, *args, **options):
+        queue = get_order_queue()
+
+        if options['stats']:
+            self.print_stats(queue)
+            return
+
+        if options['failed']:
+            for entry in queue.fetch_failed(options['batch_size']):
+                self.stdout.write(f'{entry["order_key"]}: {entry["error"]}')
+            return
+
+        while True:
+            entries = queue.fetch_batch(options['batch_size'])
+            if not entries:
+                if options['once']:
+                    break
+                queue.purge_processed(options['purge_after'])
+                time.sleep(options['interval'])
+                continue
+
+            close_old_connections()
+            orders_data = []
+            for entry in entries:
+                order_data = entry['order_data']
+                order_data['order_key'] = entry['order_key']
+                orders_data.append(order_data)
+            try:
+                created_count, errors = create_orders(orders_data)
+            except IntegrityError as error:
+                # A product was deleted while the batch was being written: the
+                # next attempt finds it missing and fails only its orders
+                self.stderr.write(f'Пачка не записана, повтор: {error}')
+                time.sleep(options['interval'])
+                continue
+            # A crash before these lines is harmless: on restart the batch is
+            # replayed and already created orders are skipped by order_key
+            queue.mark_failed({
+                entry['id']: errors[entry['order_key']]
+                for entry in entries
+                if entry['order_key'] in errors
+            })
+            queue.mark_processed([entry['id'] for entry in entries if entry['order_key'] not in errors])
+
+            lag = time.time() - entries[0]['enqueued_at']
+            self.stdout.write(
+                f'Обработано: {len(entries)}, новых заказов: {created_count}, '
+                f'не записано: {len(errors)}, отставание: {lag:.1f} с'
+            )
+            for order_key, error in errors.items():
+                self.stderr.write(f'Заказ {order_key} не записан: {error}')
+
+            # The manager page reads coordinates from the cache only, so
+            # addresses are resolved here, off the request path
+            fetch_coordinates(
+                order_data['address'] for order_data in orders_data if order_data['order_key'] not in errors
+            )
+
+        self.print_stats(queue)
+
+    def print_stats(self, queue):
+        stats = queue.get_stats()
+        self.stdout.write(
+            f'В очереди: {stats["depth"]}, отставание: {stats["lag"]:.1f} с, не записано: {stats["failed"]}'
+        )
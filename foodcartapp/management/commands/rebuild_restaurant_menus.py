@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodcartapp.availability import apply_catalog_change
+from foodcartapp.restaurant_menus import rebuild_restaurant_menus
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает меню ресторанов для API, например после смены MEDIA_URL или загрузки данных в обход Django'
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        with transaction.atomic():
+            entries_count = rebuild_restaurant_menus()
+            transaction.on_commit(apply_catalog_change)
+        self.stdout.write(f'Товаров в меню ресторанов: {entries_count}, {time.perf_counter() - started_at:.2f} с')
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodcartapp.models import Product
+from foodcartapp.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс товаров, например после загрузки данных в обход Django'
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        with transaction.atomic():
+            rebuild_search_index()
+        self.stdout.write(
+            f'Проиндексировано товаров: {Product.objects.count()}, '
+            f'{time.perf_counter() - started_at:.2f} с'
+        )
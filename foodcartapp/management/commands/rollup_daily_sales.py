@@ -0,0 +1,33 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from foodcartapp.sales import rollup_daily_sales
+
+
+class Command(BaseCommand):
+    help = 'Сводит проданное по дням, ресторанам и товарам в таблицу DailySales. Запускается раз в сутки по cron'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=datetime.date.fromisoformat,
+            help='Пересчитать и все дни начиная с этого, ГГГГ-ММ-ДД. По умолчанию только дни с изменёнными заказами',
+        )
+        parser.add_argument(
+            '--until',
+            type=datetime.date.fromisoformat,
+            help='Последний день для --since, ГГГГ-ММ-ДД. По умолчанию сегодня',
+        )
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        days, rows_count = rollup_daily_sales(options['since'], options['until'])
+        if not days:
+            self.stdout.write('Сводить нечего')
+            return
+        self.stdout.write(
+            f'Пересчитано дней: {len(days)}, с {days[0]} по {days[-1]}, строк: {rows_count}, '
+            f'{time.perf_counter() - started_at:.2f} с'
+        )
@@ -0,0 +1,199 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+
+
+CATALOG_VERSION_KEY = 'foodcartapp:catalog_version'
+
+
+def _get_shared_cache():
+    return caches[settings.MENU_CACHE_ALIAS]
+
+
+def _make_version():
+    # Versions are microsecond timestamps rather than a plain counter: if the
+    # shared cache is flushed, the new version can't collide with a stale
+    # value that is still sitting in some worker's in-process tier.
+    return time.time_ns() // 1000
+
+
+def _get_last_modified_second(version):
+    # Last-Modified has a resolution of one second, rounding up keeps it
+    # no earlier than the change it stands for
+    return -(-version // 1_000_000)
+
+
+def get_catalog_version():
+    shared_cache = _get_shared_cache()
+    version = shared_cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = _make_version()
+        if not shared_cache.add(CATALOG_VERSION_KEY, version, timeout=None):
+            version = shared_cache.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def bump_catalog_version():
+    """Move the catalog to a new version, return (version it replaced, new version).
+
+    Where the shared cache has an atomic increment, the bump is one, and the
+    replaced version is exactly the one the new version follows. Other
+    backends read and write in two steps, a bump from another process may
+    slip in between, so the replaced version is returned as None.
+    """
+    shared_cache = _get_shared_cache()
+    current_version = get_catalog_version()
+    # Versions stay timestamps, Last-Modified is derived from them. Every
+    # version also gets a second of its own, or a client revalidating with
+    # If-Modified-Since alone would get a 304 for a change made within the
+    # same second. Under a burst of changes versions run ahead of the clock.
+    next_second_version = _get_last_modified_second(current_version) * 1_000_000 + 1
+    delta = max(_make_version(), next_second_version) - current_version
+    if type(shared_cache).incr is not BaseCache.incr:
+        try:
+            version = shared_cache.incr(CATALOG_VERSION_KEY, delta)
+            return version - delta, version
+        except ValueError:
+            # Evicted since it was read
+            pass
+    version = current_version + delta
+    shared_cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+    return None, version
+
+
+def get_catalog_etag(request, *args, **kwargs):
+    version = get_catalog_version()
+    query = request.GET.urlencode()
+    if not query:
+        return str(version)
+    # Every query string variant is a separate representation of the resource
+    query_hash = hashlib.md5(query.encode()).hexdigest()[:12]
+    return f'{version}-{query_hash}'
+
+
+def get_catalog_last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(_get_last_modified_second(get_catalog_version()), tz=timezone.utc)
+
+
+class LRUCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class CatalogCache:
+    """Two-tier cache for payloads that depend on the catalog version.
+
+    Keys embed the current catalog version, so invalidation is just a version
+    bump: stale entries are never read again and expire on their own.
+    """
+
+    def __init__(self, prefix, lru_size, timeout):
+        self.prefix = prefix
+        self.timeout = timeout
+        self.local_cache = LRUCache(lru_size)
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def _count(self, event):
+        with self._stats_lock:
+            self._stats[event] += 1
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            'local_hits': stats.get('local_hits', 0),
+            'shared_hits': stats.get('shared_hits', 0),
+            'misses': stats.get('misses', 0),
+            'local_size': len(self.local_cache),
+        }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+    def make_key(self, name, version=None):
+        if version is None:
+            version = get_catalog_version()
+        return f'{self.prefix}:{version}:{name}'
+
+    def get(self, name, version):
+        key = self.make_key(name, version)
+
+        value = self.local_cache.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        value = _get_shared_cache().get(key)
+        if value is None:
+            self._count('misses')
+            return None
+
+        self._count('shared_hits')
+        self.local_cache.set(key, value)
+        return value
+
+    def set(self, name, value, version):
+        key = self.make_key(name, version)
+        _get_shared_cache().set(key, value, timeout=self.timeout)
+        self.local_cache.set(key, value)
+
+    def get_or_set(self, name, build):
+        version = get_catalog_version()
+        value = self.get(name, version)
+        if value is None:
+            value = build()
+            self.set(name, value, version)
+        return value
+
+    def stream_and_set(self, name, chunks, version):
+        """Pass byte chunks through and cache their concatenation at the end.
+
+        The version must be read before the payload is built, so that data
+        read before a concurrent catalog change is not stored under the new
+        version.
+        """
+        collected_chunks = []
+        for chunk in chunks:
+            collected_chunks.append(chunk)
+            yield chunk
+        self.set(name, b''.join(collected_chunks), version)
+
+
+menu_cache = CatalogCache(
+    'foodcartapp:menu',
+    lru_size=settings.MENU_CACHE_LRU_SIZE,
+    timeout=settings.MENU_CACHE_TIMEOUT,
+)
@@ -0,0 +1,111 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:34
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    replaces = [('foodcartapp', '0001_initial'), ('foodcartapp', '0002_auto_20200619_0836'), ('foodcartapp', '0003_auto_20200619_0838'), ('foodcartapp', '0004_auto_20200619_0843'), ('foodcartapp', '0005_auto_20200619_0845'), ('foodcartapp', '0006_auto_20200619_0849'), ('foodcartapp', '0007_auto_20200619_0849'), ('foodcartapp', '0008_hotel_city'), ('foodcartapp', '0009_auto_20200619_0919'), ('foodcartapp', '0010_auto_20200619_0921'), ('foodcartapp', '0011_auto_20200619_0922'), ('foodcartapp', '0012_auto_20200619_0924'), ('foodcartapp', '0013_auto_20200619_0932'), ('foodcartapp', '0014_auto_20200619_0934'), ('foodcartapp', '0015_auto_20200619_0935'), ('foodcartapp', '0016_restaurant_new_admin'), ('foodcartapp', '0017_auto_20200619_0945'), ('foodcartapp', '0018_remove_restaurant_admin'), ('foodcartapp', '0019_auto_20200619_0948'), ('foodcartapp', '0020_auto_20200619_0959'), ('foodcartapp', '0021_auto_20200619_1002'), ('foodcartapp', '0022_auto_20200619_1003'), ('foodcartapp', '0023_auto_20200620_0942'), ('foodcartapp', '0024_product_ingridients'), ('foodcartapp', '0025_auto_20200629_1004'), ('foodcartapp', '0026_restaurantmenuitem'), ('foodcartapp', '0027_auto_20200629_1022'), ('foodcartapp', '0028_auto_20200629_1024'), ('foodcartapp', '0029_remove_product_category'), ('foodcartapp', '0030_auto_20200629_1341'), ('foodcartapp', '0031_auto_20200703_0612'), ('foodcartapp', '0032_remove_restaurant_admin'), ('foodcartapp', '0033_auto_20200928_1930'), ('foodcartapp', '0034_auto_20200928_1930'), ('foodcartapp', '0035_auto_20200928_1941'), ('foodcartapp', '0036_auto_20210125_1532'), ('foodcartapp', '0037_auto_20210125_1833'), ('foodcartapp', '0038_order_orderitem'), ('foodcartapp', '0039_order_order_key'), ('foodcartapp', '0040_order_restaurant'), ('foodcartapp', '0041_restaurant_coordinates'), ('foodcartapp', '0042_order_status_id_index')]
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Restaurant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='название')),
+                ('address', models.CharField(blank=True, max_length=100, verbose_name='адрес')),
+                ('contact_phone', models.CharField(blank=True, max_length=50, verbose_name='контактный телефон')),
+                ('lat', models.FloatField(blank=True, editable=False, null=True, verbose_name='широта')),
+                ('lon', models.FloatField(blank=True, editable=False, null=True, verbose_name='долгота')),
+            ],
+            options={
+                'verbose_name': 'ресторан',
+                'verbose_name_plural': 'рестораны',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductCategory',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='название')),
+            ],
+            options={
+                'verbose_name': 'категория',
+                'verbose_name_plural': 'категории',
+            },
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='название')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8, validators=[django.core.validators.MinValueValidator(0)], verbose_name='цена')),
+                ('image', models.ImageField(upload_to='', verbose_name='картинка')),
+                ('special_status', models.BooleanField(db_index=True, default=False, verbose_name='спец.предложение')),
+                ('description', models.TextField(blank=True, max_length=200, verbose_name='описание')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='foodcartapp.productcategory', verbose_name='категория')),
+            ],
+            options={
+                'verbose_name': 'товар',
+                'verbose_name_plural': 'товары',
+            },
+        ),
+        migrations.CreateModel(
+            name='RestaurantMenuItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('availability', models.BooleanField(db_index=True, default=True, verbose_name='в продаже')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_items', to='foodcartapp.product', verbose_name='продукт')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_items', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'пункт меню ресторана',
+                'verbose_name_plural': 'пункты меню ресторана',
+                'unique_together': {('restaurant', 'product')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('firstname', models.CharField(max_length=50, verbose_name='имя')),
+                ('lastname', models.CharField(max_length=50, verbose_name='фамилия')),
+                ('phonenumber', models.CharField(db_index=True, max_length=20, verbose_name='телефон')),
+                ('address', models.CharField(max_length=200, verbose_name='адрес доставки')),
+                ('status', models.CharField(choices=[('unprocessed', 'необработанный'), ('cooking', 'готовится'), ('delivering', 'доставляется'), ('completed', 'выполнен')], db_index=True, default='unprocessed', max_length=20, verbose_name='статус')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='создан')),
+                ('order_key', models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='ключ идемпотентности')),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='foodcartapp.restaurant', verbose_name='готовит ресторан')),
+            ],
+            options={
+                'verbose_name': 'заказ',
+                'verbose_name_plural': 'заказы',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='количество')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8, validators=[django.core.validators.MinValueValidator(0)], verbose_name='цена на момент заказа')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='foodcartapp.order', verbose_name='заказ')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='order_items', to='foodcartapp.product', verbose_name='товар')),
+            ],
+            options={
+                'verbose_name': 'элемент заказа',
+                'verbose_name_plural': 'элементы заказа',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'id'], name='foodcartapp_status_8998df_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:14
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0037_auto_20210125_1833'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('firstname', models.CharField(max_length=50, verbose_name='имя')),
+                ('lastname', models.CharField(max_length=50, verbose_name='фамилия')),
+                ('phonenumber', models.CharField(db_index=True, max_length=20, verbose_name='телефон')),
+                ('address', models.CharField(max_length=200, verbose_name='адрес доставки')),
+                ('status', models.CharField(choices=[('unprocessed', 'необработанный'), ('cooking', 'готовится'), ('delivering', 'доставляется'), ('completed', 'выполнен')], db_index=True, default='unprocessed', max_length=20, verbose_name='статус')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='создан')),
+            ],
+            options={
+                'verbose_name': 'заказ',
+                'verbose_name_plural': 'заказы',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='количество')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8, validators=[django.core.validators.MinValueValidator(0)], verbose_name='цена на момент заказа')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='foodcartapp.order', verbose_name='заказ')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='order_items', to='foodcartapp.product', verbose_name='товар')),
+            ],
+            options={
+                'verbose_name': 'элемент заказа',
+                'verbose_name_plural': 'элементы заказа',
+            },
+        ),
+    ]
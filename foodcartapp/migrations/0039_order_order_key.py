@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0038_order_orderitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='order_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True, verbose_name='ключ идемпотентности'),
+        ),
+    ]
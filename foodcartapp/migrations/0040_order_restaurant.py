@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0039_order_order_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='foodcartapp.restaurant', verbose_name='готовит ресторан'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0040_order_restaurant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='lat',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='широта'),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='lon',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='долгота'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0041_restaurant_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'id'], name='foodcartapp_status_8998df_idx'),
+        ),
+    ]
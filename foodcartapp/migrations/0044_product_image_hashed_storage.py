@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:28
+
+from django.db import migrations, models
+import star_burger.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0042_order_status_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(storage=star_burger.storage.HashedMediaStorage(), upload_to='', verbose_name='картинка'),
+        ),
+    ]
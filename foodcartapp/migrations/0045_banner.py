@@ -0,0 +1,30 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:29
+
+from django.db import migrations, models
+import star_burger.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0044_product_image_hashed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Banner',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=50, verbose_name='заголовок')),
+                ('text', models.CharField(blank=True, max_length=200, verbose_name='текст')),
+                ('image', models.ImageField(storage=star_burger.storage.HashedMediaStorage(), upload_to='', verbose_name='картинка')),
+                ('order', models.PositiveIntegerField(db_index=True, default=0, verbose_name='порядок')),
+                ('active', models.BooleanField(db_index=True, default=True, verbose_name='показывать')),
+            ],
+            options={
+                'verbose_name': 'баннер',
+                'verbose_name_plural': 'баннеры',
+                'ordering': ['order', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # unicode61 folds case for Cyrillic too, unlike SQLite's LIKE
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE foodcartapp_product_search USING fts5("
+            "name, description, category, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute('''
+            INSERT INTO foodcartapp_product_search (rowid, name, description, category)
+            SELECT product.id, product.name, product.description, COALESCE(category.name, '')
+            FROM foodcartapp_product product
+            LEFT JOIN foodcartapp_productcategory category ON category.id = product.category_id
+        ''')
+    elif vendor == 'postgresql':
+        schema_editor.execute('''
+            CREATE TABLE foodcartapp_product_search (
+                product_id integer PRIMARY KEY,
+                document tsvector NOT NULL
+            )
+        ''')
+        schema_editor.execute(
+            'CREATE INDEX foodcartapp_product_search_document ON foodcartapp_product_search USING gin (document)'
+        )
+        schema_editor.execute('''
+            INSERT INTO foodcartapp_product_search (product_id, document)
+            SELECT
+                product.id,
+                setweight(to_tsvector('russian', product.name), 'A')
+                || setweight(to_tsvector('russian', COALESCE(category.name, '')), 'B')
+                || setweight(to_tsvector('russian', product.description), 'C')
+            FROM foodcartapp_product product
+            LEFT JOIN foodcartapp_productcategory category ON category.id = product.category_id
+        ''')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in {'sqlite', 'postgresql'}:
+        schema_editor.execute('DROP TABLE IF EXISTS foodcartapp_product_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0045_banner'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
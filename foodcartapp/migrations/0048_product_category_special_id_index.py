@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0047_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'special_status', 'id'], name='foodcartapp_categor_81ec5d_idx'),
+        ),
+    ]
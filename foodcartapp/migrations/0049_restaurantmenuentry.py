@@ -0,0 +1,50 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from foodcartapp.media import get_media_url_prefix
+from foodcartapp.serializers import PRODUCT_LIST_FIELDS, dump_json, serialize_product_row
+
+
+def fill_restaurant_menus(apps, schema_editor):
+    Product = apps.get_model('foodcartapp', 'Product')
+    RestaurantMenuItem = apps.get_model('foodcartapp', 'RestaurantMenuItem')
+    RestaurantMenuEntry = apps.get_model('foodcartapp', 'RestaurantMenuEntry')
+
+    media_url_prefix = get_media_url_prefix()
+    available_items = RestaurantMenuItem.objects.filter(availability=True)
+    products = Product.objects.filter(menu_items__in=available_items).distinct().values(*PRODUCT_LIST_FIELDS)
+    contents = {row['id']: dump_json(serialize_product_row(row, media_url_prefix)) for row in products.iterator()}
+    RestaurantMenuEntry.objects.bulk_create(
+        (
+            RestaurantMenuEntry(restaurant_id=restaurant_id, product_id=product_id, content=contents[product_id])
+            for restaurant_id, product_id in available_items.values_list('restaurant_id', 'product_id').iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0048_product_category_special_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantMenuEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField(verbose_name='товар в JSON')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_entries', to='foodcartapp.product', verbose_name='товар')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='menu_entries', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'товар в меню ресторана для API',
+                'verbose_name_plural': 'товары в меню ресторанов для API',
+                'unique_together': {('restaurant', 'product')},
+            },
+        ),
+        migrations.RunPython(fill_restaurant_menus, migrations.RunPython.noop),
+    ]
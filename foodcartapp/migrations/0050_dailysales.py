@@ -0,0 +1,42 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0049_restaurantmenuentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, verbose_name='изменён'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='день')),
+                ('quantity', models.PositiveIntegerField(verbose_name='продано, шт.')),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='выручка')),
+                ('orders_count', models.PositiveIntegerField(verbose_name='заказов')),
+                ('rolled_up_at', models.DateTimeField(db_index=True, verbose_name='сведено')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='daily_sales', to='foodcartapp.product', verbose_name='товар')),
+                ('restaurant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'продажи за день',
+                'verbose_name_plural': 'продажи по дням',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dailysales',
+            index=models.Index(fields=['restaurant', 'date'], name='foodcartapp_restaur_9e68e1_idx'),
+        ),
+    ]
@@ -1,5 +1,9 @@
 from django.db import models
+from django.db.models import DecimalField, Exists, F, OuterRef, Sum
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+
+from star_burger.storage import hashed_media_storage
 
 
 class Restaurant(models.Model):
@@ -17,6 +21,18 @@ class Restaurant(models.Model):
         max_length=50,
         blank=True,
     )
+    lat = models.FloatField(
+        'широта',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    lon = models.FloatField(
+        'долгота',
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'ресторан'
@@ -25,15 +41,19 @@ class Restaurant(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def coordinates(self):
+        if self.lat is None or self.lon is None:
+            return None
+        return self.lat, self.lon
+
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = (
-            RestaurantMenuItem.objects
-            .filter(availability=True)
-            .values_list('product')
-        )
-        return self.filter(pk__in=products)
+        # For the admin and one-off queries. The public catalog filters rows
+        # through AvailabilityIndex.filter_available instead of this subquery
+        available_menu_items = RestaurantMenuItem.objects.filter(product=OuterRef('pk'), availability=True)
+        return self.filter(Exists(available_menu_items))
 
 
 class ProductCategory(models.Model):
@@ -70,7 +90,8 @@ class Product(models.Model):
         validators=[MinValueValidator(0)]
     )
     image = models.ImageField(
-        'картинка'
+        'картинка',
+        storage=hashed_media_storage,
     )
     special_status = models.BooleanField(
         'спец.предложение',
@@ -88,10 +109,21 @@ class Product(models.Model):
     class Meta:
         verbose_name = 'товар'
         verbose_name_plural = 'товары'
+        indexes = [
+            # Catalog pages filter by category and special offers and go on by id
+            models.Index(fields=['category', 'special_status', 'id']),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded image to regenerate renditions only on upload
+        instance._loaded_image_name = instance.__dict__.get('image')
+        return instance
+
 
 class RestaurantMenuItem(models.Model):
     restaurant = models.ForeignKey(
@@ -121,3 +153,249 @@ class RestaurantMenuItem(models.Model):
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.product.name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded pair to notice when a saved item is moved to
+        # another restaurant or product
+        instance._loaded_menu_pair = (instance.__dict__.get('restaurant_id'), instance.__dict__.get('product_id'))
+        return instance
+
+
+class RestaurantMenuEntry(models.Model):
+    """A product available in a restaurant, already serialized for the menu API.
+
+    Rows are kept in sync with menu items, products and categories when they
+    change, so the menu of a restaurant is read from this table alone.
+    """
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='menu_entries',
+        verbose_name='ресторан',
+        on_delete=models.CASCADE,
+    )
+    product = models.ForeignKey(
+        Product,
+        related_name='menu_entries',
+        verbose_name='товар',
+        on_delete=models.CASCADE,
+    )
+    content = models.TextField(
+        'товар в JSON',
+    )
+
+    class Meta:
+        verbose_name = 'товар в меню ресторана для API'
+        verbose_name_plural = 'товары в меню ресторанов для API'
+        unique_together = [
+            ['restaurant', 'product']
+        ]
+
+    def __str__(self):
+        return f"{self.restaurant_id} - {self.product_id}"
+
+
+class Banner(models.Model):
+    title = models.CharField(
+        'заголовок',
+        max_length=50,
+    )
+    text = models.CharField(
+        'текст',
+        max_length=200,
+        blank=True,
+    )
+    image = models.ImageField(
+        'картинка',
+        storage=hashed_media_storage,
+    )
+    order = models.PositiveIntegerField(
+        'порядок',
+        default=0,
+        db_index=True,
+    )
+    active = models.BooleanField(
+        'показывать',
+        default=True,
+        db_index=True,
+    )
+
+    class Meta:
+        ordering = ['order', 'id']
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+
+    def __str__(self):
+        return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image_name = instance.__dict__.get('image')
+        return instance
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_total(self):
+        return self.annotate(
+            total=Sum(
+                F('items__quantity') * F('items__price'),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+        )
+
+
+class Order(models.Model):
+    UNPROCESSED = 'unprocessed'
+    COOKING = 'cooking'
+    DELIVERING = 'delivering'
+    COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (UNPROCESSED, 'необработанный'),
+        (COOKING, 'готовится'),
+        (DELIVERING, 'доставляется'),
+        (COMPLETED, 'выполнен'),
+    ]
+
+    firstname = models.CharField(
+        'имя',
+        max_length=50,
+    )
+    lastname = models.CharField(
+        'фамилия',
+        max_length=50,
+    )
+    phonenumber = models.CharField(
+        'телефон',
+        max_length=20,
+        db_index=True,
+    )
+    address = models.CharField(
+        'адрес доставки',
+        max_length=200,
+    )
+    status = models.CharField(
+        'статус',
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=UNPROCESSED,
+        db_index=True,
+    )
+    created_at = models.DateTimeField(
+        'создан',
+        default=timezone.now,
+        db_index=True,
+    )
+    updated_at = models.DateTimeField(
+        'изменён',
+        auto_now=True,
+        db_index=True,
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='orders',
+        verbose_name='готовит ресторан',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    order_key = models.CharField(
+        'ключ идемпотентности',
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'заказ'
+        verbose_name_plural = 'заказы'
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.firstname} {self.lastname}, {self.address}"
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(
+        Order,
+        related_name='items',
+        verbose_name='заказ',
+        on_delete=models.CASCADE,
+    )
+    product = models.ForeignKey(
+        Product,
+        related_name='order_items',
+        verbose_name='товар',
+        on_delete=models.PROTECT,
+    )
+    quantity = models.PositiveSmallIntegerField(
+        'количество',
+        validators=[MinValueValidator(1)],
+    )
+    price = models.DecimalField(
+        'цена на момент заказа',
+        max_digits=8,
+        decimal_places=2,
+        validators=[MinValueValidator(0)],
+    )
+
+    class Meta:
+        verbose_name = 'элемент заказа'
+        verbose_name_plural = 'элементы заказа'
+
+    def __str__(self):
+        return f"{self.product_id} x {self.quantity}"
+
+
+class DailySales(models.Model):
+    """Sales of a product by a restaurant over one day, rolled up from order items."""
+    date = models.DateField(
+        'день',
+        db_index=True,
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        related_name='daily_sales',
+        verbose_name='ресторан',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    product = models.ForeignKey(
+        Product,
+        related_name='daily_sales',
+        verbose_name='товар',
+        on_delete=models.PROTECT,
+    )
+    quantity = models.PositiveIntegerField(
+        'продано, шт.',
+    )
+    revenue = models.DecimalField(
+        'выручка',
+        max_digits=12,
+        decimal_places=2,
+    )
+    orders_count = models.PositiveIntegerField(
+        'заказов',
+    )
+    rolled_up_at = models.DateTimeField(
+        'сведено',
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'продажи за день'
+        verbose_name_plural = 'продажи по дням'
+        indexes = [
+            models.Index(fields=['restaurant', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.restaurant_id} - {self.product_id}"
@@ -0,0 +1,149 @@
+import functools
+import json
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS order_queue (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_key TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        enqueued_at REAL NOT NULL,
+        processed_at REAL,
+        error TEXT
+    )
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS order_queue_pending
+    ON order_queue (processed_at, id)
+    ''',
+]
+
+
+class OrderQueue:
+    """Durable queue of accepted orders kept in its own SQLite file.
+
+    The file is separate from the main database, so accepting an order never
+    waits for locks held by the rest of the site. WAL journaling with
+    synchronous=FULL makes every enqueued order survive a crash once
+    enqueue() has returned. An order that can't be written to the database
+    leaves the queue as failed, with the reason in the error column.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=FULL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(order_queue)')}
+            if 'error' not in columns:
+                # Queue files created before failed orders were kept
+                connection.execute('ALTER TABLE order_queue ADD COLUMN error TEXT')
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def enqueue(self, order_key, order_data):
+        """Append an order, return False if the key is already queued."""
+        payload = json.dumps(order_data, cls=DjangoJSONEncoder, ensure_ascii=False)
+        cursor = self._get_connection().execute(
+            'INSERT OR IGNORE INTO order_queue (order_key, payload, enqueued_at) VALUES (?, ?, ?)',
+            (order_key, payload, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def fetch_batch(self, limit):
+        rows = self._get_connection().execute(
+            'SELECT id, order_key, payload, enqueued_at FROM order_queue '
+            'WHERE processed_at IS NULL ORDER BY id LIMIT ?',
+            (limit,),
+        ).fetchall()
+        return [
+            {
+                'id': entry_id,
+                'order_key': order_key,
+                'order_data': json.loads(payload),
+                'enqueued_at': enqueued_at,
+            }
+            for entry_id, order_key, payload, enqueued_at in rows
+        ]
+
+    def mark_processed(self, entry_ids):
+        if not entry_ids:
+            return
+        placeholders = ', '.join('?' * len(entry_ids))
+        self._get_connection().execute(
+            f'UPDATE order_queue SET processed_at = ? WHERE id IN ({placeholders})',
+            (time.time(), *entry_ids),
+        )
+
+    def mark_failed(self, errors):
+        """Take orders out of the queue as failed, errors is {entry id: reason}."""
+        now = time.time()
+        self._get_connection().executemany(
+            'UPDATE order_queue SET processed_at = ?, error = ? WHERE id = ?',
+            [(now, error, entry_id) for entry_id, error in errors.items()],
+        )
+
+    def fetch_failed(self, limit):
+        rows = self._get_connection().execute(
+            'SELECT id, order_key, processed_at, error FROM order_queue '
+            'WHERE error IS NOT NULL ORDER BY id DESC LIMIT ?',
+            (limit,),
+        ).fetchall()
+        return [
+            {
+                'id': entry_id,
+                'order_key': order_key,
+                'failed_at': failed_at,
+                'error': error,
+            }
+            for entry_id, order_key, failed_at, error in rows
+        ]
+
+    def purge_processed(self, older_than):
+        # Failed orders stay until someone has looked at them
+        cursor = self._get_connection().execute(
+            'DELETE FROM order_queue WHERE processed_at IS NOT NULL AND processed_at < ? AND error IS NULL',
+            (time.time() - older_than,),
+        )
+        return cursor.rowcount
+
+    def get_stats(self):
+        connection = self._get_connection()
+        depth, oldest_enqueued_at = connection.execute(
+            'SELECT COUNT(*), MIN(enqueued_at) FROM order_queue WHERE processed_at IS NULL'
+        ).fetchone()
+        failed, = connection.execute('SELECT COUNT(*) FROM order_queue WHERE error IS NOT NULL').fetchone()
+        return {
+            'depth': depth,
+            'lag': time.time() - oldest_enqueued_at if oldest_enqueued_at else 0.0,
+            'failed': failed,
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def _get_order_queue(path):
+    return OrderQueue(path)
+
+
+def get_order_queue():
+    return _get_order_queue(settings.ORDER_QUEUE_PATH)
@@ -0,0 +1,212 @@
+import re
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Order, OrderItem, Product
+
+
+MAX_ITEM_QUANTITY = 100
+PHONENUMBER_PATTERN = re.compile(r'^\+?\d{10,15}$')
+ORDER_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+CUSTOMER_FIELDS = {
+    'firstname': Order._meta.get_field('firstname').max_length,
+    'lastname': Order._meta.get_field('lastname').max_length,
+    'phonenumber': Order._meta.get_field('phonenumber').max_length,
+    'address': Order._meta.get_field('address').max_length,
+}
+
+
+class OrderValidationError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def normalize_phonenumber(phonenumber):
+    return re.sub(r'[\s()-]', '', phonenumber)
+
+
+def make_order_key():
+    return uuid.uuid4().hex
+
+
+def clean_order_key(order_key):
+    if order_key is None:
+        return make_order_key()
+    if not isinstance(order_key, str) or not ORDER_KEY_PATTERN.match(order_key):
+        raise OrderValidationError({
+            'order_key': 'Ключ заказа: от 1 до 64 латинских букв, цифр, «-» или «_».',
+        })
+    return order_key
+
+
+def _clean_customer_fields(payload, errors):
+    cleaned = {}
+    for field, max_length in CUSTOMER_FIELDS.items():
+        value = payload.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors[field] = 'Обязательное поле.'
+            continue
+        value = value.strip()
+        if len(value) > max_length:
+            errors[field] = f'Не более {max_length} символов.'
+            continue
+        cleaned[field] = value
+
+    if 'phonenumber' in cleaned:
+        phonenumber = normalize_phonenumber(cleaned['phonenumber'])
+        if not PHONENUMBER_PATTERN.match(phonenumber):
+            errors['phonenumber'] = 'Некорректный номер телефона.'
+        cleaned['phonenumber'] = phonenumber
+    return cleaned
+
+
+def _clean_items(payload, errors):
+    items = payload.get('products')
+    if not isinstance(items, list) or not items:
+        errors['products'] = 'Список товаров должен быть непустым списком.'
+        return []
+
+    cleaned_items = []
+    for item in items:
+        if not isinstance(item, dict):
+            errors['products'] = 'Каждый товар должен быть объектом с полями product и quantity.'
+            return []
+        product_id = item.get('product')
+        quantity = item.get('quantity')
+        # bool is a subclass of int, but true/false are not valid ids or amounts
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            errors['products'] = f'Некорректный id товара: {product_id!r}.'
+            return []
+        if not isinstance(quantity, int) or isinstance(quantity, bool) \
+                or not 1 <= quantity <= MAX_ITEM_QUANTITY:
+            errors['products'] = f'Количество должно быть от 1 до {MAX_ITEM_QUANTITY}.'
+            return []
+        cleaned_items.append({'product': product_id, 'quantity': quantity})
+    return cleaned_items
+
+
+def parse_order_payload(payload):
+    """Validate a checkout payload and snapshot current product prices.
+
+    Every referenced product is fetched with a single in_bulk query no matter
+    how many items the cart has.
+    """
+    if not isinstance(payload, dict):
+        raise OrderValidationError({'non_field_errors': 'Ожидался JSON-объект.'})
+
+    errors = {}
+    order_data = _clean_customer_fields(payload, errors)
+    items = _clean_items(payload, errors)
+
+    if items:
+        product_ids = {item['product'] for item in items}
+        products = Product.objects.only('price').in_bulk(product_ids)
+        prices = {pk: product.price for pk, product in products.items()}
+        unknown_ids = sorted(product_ids - prices.keys())
+        if unknown_ids:
+            errors['products'] = f'Товары не найдены: {unknown_ids}.'
+        for item in items:
+            item['price'] = prices.get(item['product'])
+
+    if errors:
+        raise OrderValidationError(errors)
+
+    order_data['items'] = items
+    return order_data
+
+
+def _build_order(order_data):
+    created_at = order_data.get('created_at')
+    if isinstance(created_at, str):
+        created_at = parse_datetime(created_at)
+    return Order(
+        firstname=order_data['firstname'],
+        lastname=order_data['lastname'],
+        phonenumber=order_data['phonenumber'],
+        address=order_data['address'],
+        order_key=order_data.get('order_key'),
+        created_at=created_at or timezone.now(),
+    )
+
+
+def _build_order_items(order_id, order_data):
+    return [
+        OrderItem(
+            order_id=order_id,
+            product_id=item['product'],
+            quantity=item['quantity'],
+            price=item['price'],
+        )
+        for item in order_data['items']
+    ]
+
+
+def create_order(order_data):
+    with transaction.atomic():
+        order = _build_order(order_data)
+        order.save()
+        OrderItem.objects.bulk_create(_build_order_items(order.id, order_data))
+    return order
+
+
+def _find_missing_products(orders_data):
+    product_ids = {item['product'] for order_data in orders_data for item in order_data['items']}
+    existing_ids = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+    errors = {}
+    for order_data in orders_data:
+        missing_ids = sorted({item['product'] for item in order_data['items']} - existing_ids)
+        if missing_ids:
+            errors[order_data['order_key']] = f'Товары не найдены: {missing_ids}.'
+    return errors
+
+
+def create_orders(orders_data):
+    """Insert a batch of orders idempotently.
+
+    Orders whose order_key is already in the database are skipped, so the
+    same batch can be replayed safely after a crash. Prices were snapshotted
+    when the order was accepted, but its products may have been deleted
+    since: such orders are not written and don't hold back the rest of the
+    batch.
+
+    Return the number of new orders and {order_key: reason} of the orders
+    that could not be written. The cost is a fixed number of queries per
+    batch regardless of its size.
+    """
+    orders_by_key = {}
+    for order_data in orders_data:
+        orders_by_key.setdefault(order_data['order_key'], order_data)
+
+    with transaction.atomic():
+        existing_keys = set(
+            Order.objects
+            .filter(order_key__in=orders_by_key.keys())
+            .values_list('order_key', flat=True)
+        )
+        new_orders = [
+            order_data
+            for order_key, order_data in orders_by_key.items()
+            if order_key not in existing_keys
+        ]
+        errors = _find_missing_products(new_orders)
+        new_orders = [order_data for order_data in new_orders if order_data['order_key'] not in errors]
+        if not new_orders:
+            return 0, errors
+
+        Order.objects.bulk_create([_build_order(order_data) for order_data in new_orders])
+        # Not every backend returns primary keys from bulk_create
+        order_ids = dict(
+            Order.objects
+            .filter(order_key__in=[order_data['order_key'] for order_data in new_orders])
+            .values_list('order_key', 'id')
+        )
+        OrderItem.objects.bulk_create([
+            order_item
+            for order_data in new_orders
+            for order_item in _build_order_items(order_ids[order_data['order_key']], order_data)
+        ])
+    return len(new_orders), errors
@@ -0,0 +1,97 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .media import build_media_url, get_media_url_prefix
+
+
+# Bounding boxes are twice the CSS size the images are shown at, to stay
+# sharp on HiDPI screens
+RENDITIONS = {
+    'small': (100, 100),
+    'card': (500, 500),
+    'carousel_small': (640, 250),
+    'carousel': (1280, 500),
+}
+
+PRODUCT_RENDITIONS = ['small', 'card']
+BANNER_RENDITIONS = ['carousel_small', 'carousel']
+
+RENDITIONS_DIR = 'renditions'
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# Pillow may be built without libwebp, JPEG is the portable fallback
+RENDITION_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+RENDITION_EXTENSION = '.webp' if RENDITION_FORMAT == 'WEBP' else '.jpg'
+
+
+def get_rendition_name(image_name, rendition):
+    stem, _ = os.path.splitext(image_name)
+    return f'{RENDITIONS_DIR}/{rendition}/{stem}{RENDITION_EXTENSION}'
+
+
+def get_rendition_url(image_name, rendition, media_url_prefix=None):
+    if not image_name:
+        return None
+    if media_url_prefix is None:
+        media_url_prefix = get_media_url_prefix()
+    return build_media_url(media_url_prefix, get_rendition_name(image_name, rendition))
+
+
+def get_rendition_urls(image_name, renditions=PRODUCT_RENDITIONS, media_url_prefix=None):
+    if not image_name:
+        return None
+    return {
+        rendition: get_rendition_url(image_name, rendition, media_url_prefix)
+        for rendition in renditions
+    }
+
+
+def _encode(image, size):
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(size, Image.LANCZOS)
+
+    if RENDITION_FORMAT == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+
+    encoded = io.BytesIO()
+    if RENDITION_FORMAT == 'WEBP':
+        image.save(encoded, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(encoded, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return encoded.getvalue()
+
+
+def generate_renditions(image_name, renditions=PRODUCT_RENDITIONS, overwrite=False, storage=default_storage):
+    """Write the renditions of the image to the storage, return the number written."""
+    rendition_names = {
+        rendition: get_rendition_name(image_name, rendition)
+        for rendition in renditions
+    }
+    if not overwrite:
+        rendition_names = {
+            rendition: name
+            for rendition, name in rendition_names.items()
+            if not storage.exists(name)
+        }
+    if not rendition_names:
+        return 0
+
+    with storage.open(image_name, 'rb') as image_file:
+        with Image.open(image_file) as image:
+            image.load()
+
+    for rendition, name in rendition_names.items():
+        content = _encode(image.copy(), RENDITIONS[rendition])
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, ContentFile(content))
+    return len(rendition_names)
@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+from .media import get_media_url_prefix
+from .models import Product, RestaurantMenuEntry, RestaurantMenuItem
+from .serializers import PRODUCT_LIST_FIELDS, dump_json, serialize_product_row
+
+
+BATCH_SIZE = 500
+
+
+def _iter_batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def dump_products(product_ids):
+    """Return the JSON of every product the menu API shows, by product id."""
+    media_url_prefix = get_media_url_prefix()
+    rows = Product.objects.filter(id__in=product_ids).values(*PRODUCT_LIST_FIELDS)
+    return {row['id']: dump_json(serialize_product_row(row, media_url_prefix)) for row in rows}
+
+
+def sync_menu_entries(pairs):
+    """Make menu entries of the (restaurant_id, product_id) pairs match the menu items.
+
+    An entry exists exactly when the menu item exists and is available.
+    """
+    product_ids_by_restaurant = defaultdict(set)
+    for restaurant_id, product_id in pairs:
+        product_ids_by_restaurant[restaurant_id].add(product_id)
+
+    for restaurant_id, product_ids in product_ids_by_restaurant.items():
+        for batch in _iter_batches(product_ids):
+            available_ids = set(
+                RestaurantMenuItem.objects
+                .filter(restaurant_id=restaurant_id, product_id__in=batch, availability=True)
+                .values_list('product_id', flat=True)
+            )
+            entries = RestaurantMenuEntry.objects.filter(restaurant_id=restaurant_id, product_id__in=batch)
+            existing_ids = set(entries.values_list('product_id', flat=True))
+
+            removed_ids = existing_ids - available_ids
+            if removed_ids:
+                entries.filter(product_id__in=removed_ids).delete()
+
+            contents = dump_products(available_ids - existing_ids)
+            RestaurantMenuEntry.objects.bulk_create(
+                [
+                    RestaurantMenuEntry(restaurant_id=restaurant_id, product_id=product_id, content=content)
+                    for product_id, content in contents.items()
+                ],
+                ignore_conflicts=True,
+            )
+
+
+def refresh_menu_products(product_ids):
+    """Serialize the products again in every menu they are in."""
+    for batch in _iter_batches(product_ids):
+        listed_ids = (
+            RestaurantMenuEntry.objects
+            .filter(product_id__in=batch)
+            .values_list('product_id', flat=True)
+            .distinct()
+        )
+        for product_id, content in dump_products(listed_ids).items():
+            RestaurantMenuEntry.objects.filter(product_id=product_id).update(content=content)
+
+
+def rebuild_restaurant_menus():
+    """Fill menu entries from scratch, return their number."""
+    RestaurantMenuEntry.objects.all().delete()
+    available_items = RestaurantMenuItem.objects.filter(availability=True)
+    product_ids = available_items.order_by('product_id').values_list('product_id', flat=True).distinct()
+
+    entries_count = 0
+    for batch in _iter_batches(product_ids):
+        contents = dump_products(batch)
+        entries = [
+            RestaurantMenuEntry(restaurant_id=restaurant_id, product_id=product_id, content=contents[product_id])
+            for restaurant_id, product_id in (
+                available_items
+                .filter(product_id__in=batch)
+                .values_list('restaurant_id', 'product_id')
+            )
+        ]
+        RestaurantMenuEntry.objects.bulk_create(entries)
+        entries_count += len(entries)
+    return entries_count
+
+
+def dump_restaurant_menu_json(restaurant_id):
+    contents = (
+        RestaurantMenuEntry.objects
+        .filter(restaurant_id=restaurant_id)
+        .order_by('product_id')
+        .values_list('content', flat=True)
+    )
+    return f'[{",".join(contents)}]'.encode()
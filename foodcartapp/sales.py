@@ -0,0 +1,125 @@
+import datetime
+
+import pytz
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, DateTimeField, DecimalField, F, Max, Min, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailySales, Order, OrderItem
+
+
+# Names in the rollup query mapped to DailySales fields
+ROLLUP_FIELDS = {
+    'sales_date': 'date',
+    'order__restaurant': 'restaurant',
+    'product': 'product',
+    'quantity_sum': 'quantity',
+    'revenue_sum': 'revenue',
+    'orders': 'orders_count',
+    'rolled_up_at': 'rolled_up_at',
+}
+
+
+def get_sales_timezone():
+    return pytz.timezone(settings.SALES_TIME_ZONE)
+
+
+def get_day_start(day):
+    return get_sales_timezone().localize(datetime.datetime.combine(day, datetime.time.min))
+
+
+def get_sales_date(field_name):
+    return TruncDate(field_name, tzinfo=get_sales_timezone())
+
+
+def get_first_sales_day():
+    first_order_at = OrderItem.objects.aggregate(first_order_at=Min('order__created_at'))['first_order_at']
+    if first_order_at is None:
+        return None
+    return timezone.localtime(first_order_at, get_sales_timezone()).date()
+
+
+def get_changed_days():
+    """Return the days of orders created or changed since the last rollup.
+
+    Every rolled up row keeps the moment its rollup started, the latest one is
+    the watermark. A restaurant assigned or an item edited after the day was
+    rolled up moves the order past it. None means nothing is rolled up yet.
+    """
+    watermark = DailySales.objects.aggregate(watermark=Max('rolled_up_at'))['watermark']
+    if watermark is None:
+        return None
+    return set(
+        Order.objects
+        .filter(updated_at__gte=watermark)
+        .annotate(sales_date=get_sales_date('created_at'))
+        .values_list('sales_date', flat=True)
+        .distinct()
+    )
+
+
+def rollup_daily_sales(since=None, until=None):
+    """Aggregate order items of the changed days into DailySales.
+
+    Days from get_changed_days() are recomputed together with the days from
+    since to until, until defaults to today. Before the first rollup since
+    defaults to the day of the first order. The days are replaced as a whole,
+    so a rollup can be rerun any number of times. Prices come from the order
+    items, as they were at the moment of purchase. Return the sorted list of
+    recomputed days and the number of rows written.
+    """
+    started_at = timezone.now()
+    days = get_changed_days()
+    if days is None:
+        days = set()
+        since = since or get_first_sales_day()
+    if since is not None:
+        until = until or timezone.localtime(started_at, get_sales_timezone()).date()
+        days.update(since + datetime.timedelta(days=offset) for offset in range((until - since).days + 1))
+    if not days:
+        return [], 0
+    days = sorted(days)
+    first_day, last_day = days[0], days[-1]
+
+    items = (
+        OrderItem.objects
+        .filter(
+            order__created_at__gte=get_day_start(first_day),
+            order__created_at__lt=get_day_start(last_day + datetime.timedelta(days=1)),
+        )
+        .annotate(sales_date=get_sales_date('order__created_at'))
+    )
+    rolled_up_sales = DailySales.objects.filter(date__gte=first_day, date__lte=last_day)
+    if len(days) <= (last_day - first_day).days:
+        # Some days in between are left as they are, the range still narrows the scan by index
+        items = items.filter(sales_date__in=days)
+        rolled_up_sales = rolled_up_sales.filter(date__in=days)
+
+    day_sales = (
+        items
+        .values('sales_date', 'order__restaurant', 'product')
+        .annotate(
+            quantity_sum=Sum('quantity'),
+            revenue_sum=Sum(F('price') * F('quantity'), output_field=DecimalField()),
+            orders=Count('order', distinct=True),
+            rolled_up_at=Value(started_at, output_field=DateTimeField()),
+        )
+        .order_by()
+    )
+    select_sql, params = day_sales.query.sql_with_params()
+
+    # Django puts grouped fields before annotations, take the order from the query itself
+    selected_names = [*day_sales.query.values_select, *day_sales.query.annotation_select]
+    columns = ', '.join(
+        connection.ops.quote_name(DailySales._meta.get_field(ROLLUP_FIELDS[name]).column)
+        for name in selected_names
+    )
+    table = connection.ops.quote_name(DailySales._meta.db_table)
+    with transaction.atomic():
+        rolled_up_sales.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'INSERT INTO {table} ({columns}) {select_sql}', params)
+            rows_count = cursor.rowcount
+    return days, rows_count
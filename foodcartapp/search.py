@@ -0,0 +1,267 @@
+import heapq
+import re
+import threading
+from operator import itemgetter
+
+from django.db import connection, connections, router
+from django.db.models import Q
+
+from .availability import get_availability_index
+from .menu_cache import get_catalog_version
+from .models import Product
+
+
+SEARCH_TABLE = 'foodcartapp_product_search'
+
+# Django's icontains goes through LIKE, which SQLite only case folds for
+# ASCII. Both the index and the trie fold case in Python or in the tokenizer.
+WORD_RE = re.compile(r'\w+')
+
+INDEX_BATCH_SIZE = 500
+
+SQLITE_INDEX_SQL = f'''
+    INSERT INTO {SEARCH_TABLE} (rowid, name, description, category)
+    SELECT product.id, product.name, product.description, COALESCE(category.name, '')
+    FROM foodcartapp_product product
+    LEFT JOIN foodcartapp_productcategory category ON category.id = product.category_id
+'''
+
+POSTGRESQL_INDEX_SQL = f'''
+    INSERT INTO {SEARCH_TABLE} (product_id, document)
+    SELECT
+        product.id,
+        setweight(to_tsvector('russian', product.name), 'A')
+        || setweight(to_tsvector('russian', COALESCE(category.name, '')), 'B')
+        || setweight(to_tsvector('russian', product.description), 'C')
+    FROM foodcartapp_product product
+    LEFT JOIN foodcartapp_productcategory category ON category.id = product.category_id
+'''
+
+
+def split_words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def _is_supported(db_connection):
+    return db_connection.vendor in {'sqlite', 'postgresql'}
+
+
+def _index_sql(db_connection):
+    if db_connection.vendor == 'postgresql':
+        return POSTGRESQL_INDEX_SQL
+    return SQLITE_INDEX_SQL
+
+
+def _key_column(db_connection):
+    return 'product_id' if db_connection.vendor == 'postgresql' else 'rowid'
+
+
+def index_products(product_ids):
+    """Write the current name, description and category of the products to the search index."""
+    if not _is_supported(connection):
+        return
+    product_ids = list(product_ids)
+    key_column = _key_column(connection)
+    with connection.cursor() as cursor:
+        for start in range(0, len(product_ids), INDEX_BATCH_SIZE):
+            batch = product_ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE {key_column} IN ({placeholders})', batch)
+            cursor.execute(f'{_index_sql(connection)} WHERE product.id IN ({placeholders})', batch)
+
+
+def remove_products(product_ids):
+    if not _is_supported(connection):
+        return
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(product_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE {_key_column(connection)} IN ({placeholders})', product_ids)
+
+
+def rebuild_search_index():
+    if not _is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(_index_sql(connection))
+
+
+def _sqlite_match(words):
+    # Every word is a prefix: "чиз бур" finds "Чизбургер с беконом"
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _postgresql_match(words):
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def _icontains_query(words):
+    query = Q()
+    for word in words:
+        query &= Q(name__icontains=word) | Q(description__icontains=word) | Q(category__name__icontains=word)
+    return query
+
+
+# bm25 weights follow the column order: name, description, category
+SQLITE_RANK_SQL = f'bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0)'
+POSTGRESQL_RANK_SQL = f"ts_rank({SEARCH_TABLE}.document, to_tsquery('russian', %s))"
+
+
+def _iter_matching_product_ids(words):
+    db_connection = connections[router.db_for_read(Product)]
+
+    if db_connection.vendor == 'sqlite':
+        match = _sqlite_match(words)
+        sql = f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY {SQLITE_RANK_SQL}'
+    elif db_connection.vendor == 'postgresql':
+        match = _postgresql_match(words)
+        sql = (
+            f'SELECT product_id FROM {SEARCH_TABLE} '
+            f"WHERE document @@ to_tsquery('russian', %s) "
+            f'ORDER BY {POSTGRESQL_RANK_SQL} DESC, product_id'
+        )
+    else:
+        products = Product.objects.filter(_icontains_query(words)).order_by('name')
+        yield from products.values_list('id', flat=True).iterator()
+        return
+
+    params = [match, match] if db_connection.vendor == 'postgresql' else [match]
+    with db_connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(INDEX_BATCH_SIZE)
+            if not rows:
+                return
+            for (product_id,) in rows:
+                yield product_id
+
+
+def filter_products(products, query):
+    """Narrow a product queryset to the ones matching every word of the query, best first.
+
+    The search table is joined into the query instead of being read into a
+    list of ids, so a query matching the whole catalog is still a single
+    statement. The rank is selected as search_rank, lower is better, and
+    stays available for ordering after another order_by().
+    """
+    words = split_words(query)
+    if not words:
+        return products.none()
+
+    vendor = connections[products.db].vendor
+    product_table = Product._meta.db_table
+    if vendor == 'sqlite':
+        return products.extra(
+            select={'search_rank': SQLITE_RANK_SQL},
+            tables=[SEARCH_TABLE],
+            where=[f'{SEARCH_TABLE} MATCH %s', f'{SEARCH_TABLE}.rowid = {product_table}.id'],
+            params=[_sqlite_match(words)],
+        ).order_by('search_rank')
+    if vendor == 'postgresql':
+        match = _postgresql_match(words)
+        return products.extra(
+            select={'search_rank': f'-{POSTGRESQL_RANK_SQL}'},
+            select_params=[match],
+            tables=[SEARCH_TABLE],
+            where=[
+                f"{SEARCH_TABLE}.document @@ to_tsquery('russian', %s)",
+                f'{SEARCH_TABLE}.product_id = {product_table}.id',
+            ],
+            params=[match],
+        ).order_by('search_rank')
+    return products.filter(_icontains_query(words)).order_by('name')
+
+
+def search_product_ids(query, limit=None, only_available=True):
+    """Return ids of products matching every word of the query, best matches first."""
+    words = split_words(query)
+    if not words:
+        return []
+
+    availability_index = get_availability_index() if only_available else None
+    product_ids = []
+    for product_id in _iter_matching_product_ids(words):
+        if availability_index and not availability_index.is_available(product_id):
+            continue
+        product_ids.append(product_id)
+        if limit and len(product_ids) >= limit:
+            break
+    return product_ids
+
+
+class PrefixTrie:
+    """Words of product names, each leading to the products that contain it.
+
+    Values live under the None key of the node where their word ends, so
+    everything below a node is what starts with the node's prefix.
+    """
+
+    def __init__(self, version=None):
+        self.version = version
+        self.root = {}
+        self.names = {}
+
+    @classmethod
+    def load(cls, version=None):
+        trie = cls(version=version)
+        rows = Product.objects.values_list('id', 'name').iterator()
+        for product_id, name in get_availability_index().filter_available(rows, key=itemgetter(0)):
+            trie.add(product_id, name)
+        return trie
+
+    def add(self, product_id, name):
+        self.names[product_id] = name
+        for word in set(split_words(name)):
+            node = self.root
+            for letter in word:
+                node = node.setdefault(letter, {})
+            node.setdefault(None, set()).add(product_id)
+
+    def find(self, prefix):
+        node = self.root
+        for letter in prefix:
+            node = node.get(letter)
+            if node is None:
+                return set()
+
+        product_ids = set()
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            for key, child in node.items():
+                if key is None:
+                    product_ids |= child
+                else:
+                    nodes.append(child)
+        return product_ids
+
+    def complete(self, query, limit=10):
+        """Return (id, name) of products having a word starting with every word of the query."""
+        words = sorted(set(split_words(query)), key=len, reverse=True)
+        if not words:
+            return []
+        # The longest prefix has the smallest subtree, start from it
+        product_ids = self.find(words[0])
+        for word in words[1:]:
+            if not product_ids:
+                break
+            product_ids &= self.find(word)
+        names = heapq.nsmallest(limit, ((self.names[product_id], product_id) for product_id in product_ids))
+        return [(product_id, name) for name, product_id in names]
+
+
+_trie = None
+_trie_lock = threading.Lock()
+
+
+def get_product_trie():
+    """Return the process-wide trie, rebuilding it if the catalog changed."""
+    global _trie
+    version = get_catalog_version()
+    with _trie_lock:
+        if _trie is None or _trie.version != version:
+            _trie = PrefixTrie.load(version=version)
+        return _trie
@@ -0,0 +1,95 @@
+import json
+import textwrap
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .media import build_media_url, get_media_url_prefix
+from .renditions import BANNER_RENDITIONS, RENDITIONS, get_rendition_urls
+
+
+PRODUCT_LIST_FIELDS = [
+    'id',
+    'name',
+    'price',
+    'special_status',
+    'description',
+    'category_id',
+    'category__name',
+    'image',
+]
+
+PRODUCTS_PER_CHUNK = 100
+
+
+def serialize_product_row(row, media_url_prefix):
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'price': row['price'],
+        'special_status': row['special_status'],
+        'description': row['description'],
+        'category': {
+            'id': row['category_id'],
+            'name': row['category__name'],
+        } if row['category_id'] else None,
+        'image': build_media_url(media_url_prefix, row['image']),
+        'image_renditions': get_rendition_urls(row['image'], media_url_prefix=media_url_prefix),
+    }
+
+
+def serialize_banner(banner, media_url_prefix):
+    urls = get_rendition_urls(banner.image.name, BANNER_RENDITIONS, media_url_prefix)
+    return {
+        'title': banner.title,
+        'text': banner.text,
+        'src': urls['carousel'],
+        'srcset': ', '.join(
+            f'{urls[rendition]} {RENDITIONS[rendition][0]}w'
+            for rendition in BANNER_RENDITIONS
+        ),
+    }
+
+
+def dump_banner_list_json(banners):
+    media_url_prefix = get_media_url_prefix()
+    return dump_json([serialize_banner(banner, media_url_prefix) for banner in banners]).encode()
+
+
+def dump_json(obj, pretty=False):
+    if pretty:
+        return json.dumps(obj, cls=DjangoJSONEncoder, ensure_ascii=False, indent=4)
+    return json.dumps(obj, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_product_list_json(rows, pretty=False):
+    """Yield the JSON array of product rows as encoded chunks.
+
+    Rows are dicts of PRODUCT_LIST_FIELDS, best from .values().iterator(), so
+    neither model instances nor the whole list of dicts are ever held in
+    memory.
+    """
+    media_url_prefix = get_media_url_prefix()
+
+    if pretty:
+        opening, separator, closing = '[\n', ',\n', '\n]'
+    else:
+        opening, separator, closing = '[', ',', ']'
+
+    buffer = []
+    count = 0
+    for row in rows:
+        dumped_product = dump_json(serialize_product_row(row, media_url_prefix), pretty=pretty)
+        if pretty:
+            dumped_product = textwrap.indent(dumped_product, ' ' * 4)
+        buffer.append(opening if not count else separator)
+        buffer.append(dumped_product)
+        count += 1
+        if count % PRODUCTS_PER_CHUNK == 0:
+            yield ''.join(buffer).encode()
+            buffer = []
+
+    if not count:
+        yield b'[]'
+        return
+    buffer.append(closing)
+    yield ''.join(buffer).encode()
@@ -0,0 +1,147 @@
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from places.coordinates import fetch_coordinates
+
+from .availability import apply_catalog_change
+from .models import Banner, Order, OrderItem, Product, ProductCategory, Restaurant, RestaurantMenuItem
+from .renditions import BANNER_RENDITIONS, PRODUCT_RENDITIONS, generate_renditions
+from .restaurant_menus import refresh_menu_products, sync_menu_entries
+from .search import index_products, remove_products
+
+
+logger = logging.getLogger(__name__)
+
+
+CATALOG_MODELS = [
+    Banner,
+    Product,
+    ProductCategory,
+    Restaurant,
+]
+
+IMAGE_RENDITIONS = {
+    Banner: BANNER_RENDITIONS,
+    Product: PRODUCT_RENDITIONS,
+}
+
+
+def invalidate_catalog(sender, **kwargs):
+    # Bump only after commit, otherwise a concurrent request could rebuild
+    # the menu from not yet committed data and cache it under the new version.
+    transaction.on_commit(apply_catalog_change)
+
+
+def update_menu_item_availability(sender, instance, **kwargs):
+    changes = []
+    loaded_pair = getattr(instance, '_loaded_menu_pair', None)
+    current_pair = (instance.restaurant_id, instance.product_id)
+    if loaded_pair and loaded_pair != current_pair:
+        changes.append((*loaded_pair, False))
+    changes.append((*current_pair, instance.availability))
+    instance._loaded_menu_pair = current_pair
+    sync_menu_entries((restaurant_id, product_id) for restaurant_id, product_id, _ in changes)
+    transaction.on_commit(partial(apply_catalog_change, changes))
+
+
+def remove_menu_item_availability(sender, instance, **kwargs):
+    changes = [(instance.restaurant_id, instance.product_id, False)]
+    sync_menu_entries([(instance.restaurant_id, instance.product_id)])
+    transaction.on_commit(partial(apply_catalog_change, changes))
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog, sender=model, dispatch_uid=f'invalidate_catalog_on_save_{model.__name__}')
+    post_delete.connect(invalidate_catalog, sender=model, dispatch_uid=f'invalidate_catalog_on_delete_{model.__name__}')
+
+post_save.connect(update_menu_item_availability, sender=RestaurantMenuItem, dispatch_uid='update_menu_item_availability')
+post_delete.connect(remove_menu_item_availability, sender=RestaurantMenuItem, dispatch_uid='remove_menu_item_availability')
+
+
+def update_restaurant_coordinates(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.pk and instance.coordinates:
+        saved_address = (
+            Restaurant.objects
+            .filter(pk=instance.pk)
+            .values_list('address', flat=True)
+            .first()
+        )
+        if saved_address == instance.address:
+            return
+    coordinates = fetch_coordinates([instance.address]).get(instance.address)
+    instance.lat, instance.lon = coordinates or (None, None)
+
+
+pre_save.connect(update_restaurant_coordinates, sender=Restaurant, dispatch_uid='update_restaurant_coordinates')
+
+
+def generate_image_renditions(sender, instance, raw=False, **kwargs):
+    if raw or not instance.image:
+        return
+    if instance.image.name == getattr(instance, '_loaded_image_name', None):
+        return
+    try:
+        generate_renditions(instance.image.name, IMAGE_RENDITIONS[sender], overwrite=True)
+    except (OSError, ValueError):
+        # The row is already saved, the generate_renditions command fills the gap later
+        logger.exception('Не удалось создать уменьшенные копии картинки %r', instance.image.name)
+        return
+    instance._loaded_image_name = instance.image.name
+
+
+for model in IMAGE_RENDITIONS:
+    post_save.connect(generate_image_renditions, sender=model, dispatch_uid=f'generate_image_renditions_{model.__name__}')
+
+
+def update_product_search_index(sender, instance, **kwargs):
+    index_products([instance.pk])
+
+
+def remove_product_from_search_index(sender, instance, **kwargs):
+    remove_products([instance.pk])
+
+
+def update_category_search_index(sender, instance, **kwargs):
+    index_products(instance.products.values_list('pk', flat=True))
+
+
+def update_uncategorized_search_index(sender, instance, **kwargs):
+    # Deleting a category sets NULL in its products without their signals
+    index_products(Product.objects.filter(category__isnull=True).values_list('pk', flat=True))
+
+
+def refresh_product_in_menus(sender, instance, **kwargs):
+    refresh_menu_products([instance.pk])
+
+
+def refresh_category_in_menus(sender, instance, **kwargs):
+    refresh_menu_products(instance.products.values_list('pk', flat=True))
+
+
+def refresh_uncategorized_in_menus(sender, instance, **kwargs):
+    refresh_menu_products(Product.objects.filter(category__isnull=True).values_list('pk', flat=True))
+
+
+post_save.connect(update_product_search_index, sender=Product, dispatch_uid='update_product_search_index')
+post_delete.connect(remove_product_from_search_index, sender=Product, dispatch_uid='remove_product_from_search_index')
+post_save.connect(update_category_search_index, sender=ProductCategory, dispatch_uid='update_category_search_index_on_save')
+post_delete.connect(update_uncategorized_search_index, sender=ProductCategory, dispatch_uid='update_uncategorized_search_index')
+
+post_save.connect(refresh_product_in_menus, sender=Product, dispatch_uid='refresh_product_in_menus')
+post_save.connect(refresh_category_in_menus, sender=ProductCategory, dispatch_uid='refresh_category_in_menus')
+post_delete.connect(refresh_uncategorized_in_menus, sender=ProductCategory, dispatch_uid='refresh_uncategorized_in_menus')
+
+
+def touch_order(sender, instance, **kwargs):
+    # An edited item changes the sales of its order day, the next rollup has to see it
+    Order.objects.filter(pk=instance.order_id).update(updated_at=timezone.now())
+
+
+post_save.connect(touch_order, sender=OrderItem, dispatch_uid='touch_order_on_item_save')
+post_delete.connect(touch_order, sender=OrderItem, dispatch_uid='touch_order_on_item_delete')
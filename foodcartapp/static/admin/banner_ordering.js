@@ -0,0 +1,42 @@
+// Drag rows of the banner list to reorder them, then press "Save":
+// the "order" inputs are renumbered to follow the rows.
+window.addEventListener('load', function () {
+  var tbody = document.querySelector('#result_list tbody');
+  if (!tbody) {
+    return;
+  }
+  var draggedRow = null;
+
+  function renumber() {
+    tbody.querySelectorAll('tr').forEach(function (row, index) {
+      var orderInput = row.querySelector('input[name$="-order"]');
+      if (orderInput) {
+        orderInput.value = index;
+      }
+      row.classList.remove('row1', 'row2');
+      row.classList.add(index % 2 ? 'row2' : 'row1');
+    });
+  }
+
+  tbody.querySelectorAll('tr').forEach(function (row) {
+    row.draggable = true;
+    row.style.cursor = 'move';
+    row.addEventListener('dragstart', function (event) {
+      draggedRow = row;
+      event.dataTransfer.effectAllowed = 'move';
+    });
+    row.addEventListener('dragover', function (event) {
+      event.preventDefault();
+      if (!draggedRow || draggedRow === row) {
+        return;
+      }
+      var box = row.getBoundingClientRect();
+      var after = event.clientY > box.top + box.height / 2;
+      tbody.insertBefore(draggedRow, after ? row.nextSibling : row);
+    });
+    row.addEventListener('dragend', function () {
+      draggedRow = null;
+      renumber();
+    });
+  });
+});
@@ -0,0 +1,11 @@
+from django import template
+
+from foodcartapp.renditions import get_rendition_url
+
+
+register = template.Library()
+
+
+@register.filter
+def rendition_url(image, rendition):
+    return get_rendition_url(image.name if image else None, rendition)
@@ -0,0 +1,846 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.templatetags.static import static
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from places.coordinates import normalize_address
+from places.models import Place
+from star_burger.testing import StarBurgerTestCase
+from star_burger.views import HASHED_MEDIA_NAME_RE, IMMUTABLE_MAX_AGE, serve_media
+
+from .availability import apply_catalog_change, get_availability_index, set_menu_availability
+from .catalog import get_product_page_queryset
+from .catalog_io import CatalogImporter, CatalogImportError, export_catalog
+from .menu_cache import CatalogCache, bump_catalog_version, get_catalog_version
+from .models import (
+    Banner,
+    DailySales,
+    Order,
+    OrderItem,
+    Product,
+    ProductCategory,
+    Restaurant,
+    RestaurantMenuEntry,
+    RestaurantMenuItem,
+)
+from .order_queue import OrderQueue
+from .orders import parse_order_payload
+from .renditions import BANNER_RENDITIONS, get_rendition_name, get_rendition_urls
+from .sales import get_day_start, get_sales_timezone, rollup_daily_sales
+from .serializers import PRODUCTS_PER_CHUNK, dump_json, iter_product_list_json, serialize_product_row
+
+
+class CatalogConditionalGetTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        restaurant = Restaurant.objects.create(name='Star Burger Арбат', address='Москва, Арбат, 1')
+        category = ProductCategory.objects.create(name='Бургеры')
+        product = Product.objects.create(name='Чизбургер', category=category, price=150)
+        RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+        # No post_save, so no renditions are generated for a file that is not there
+        Banner.objects.bulk_create([Banner(title='Скидка', image='banner.0123456789ab.jpg')])
+
+    def assert_not_modified_without_queries(self, path, headers):
+        with self.assertNumQueries(0):
+            response = self.client.get(path, **headers)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_none_match_issues_no_queries(self):
+        for path in ['/api/products/', '/api/banners/']:
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assert_not_modified_without_queries(path, {'HTTP_IF_NONE_MATCH': response['ETag']})
+
+    def test_if_modified_since_issues_no_queries(self):
+        for path in ['/api/products/', '/api/banners/']:
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assert_not_modified_without_queries(path, {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']})
+
+    def test_changes_within_a_second_change_last_modified(self):
+        # Both changes land in the same second of the clock
+        with patch('foodcartapp.menu_cache._make_version', return_value=1_700_000_000_200_000):
+            last_modified = self.client.get('/api/products/')['Last-Modified']
+            with self.captureOnCommitCallbacks(execute=True):
+                Product.objects.first().save()
+
+            response = self.client.get('/api/products/', HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_catalog_change_changes_etag(self):
+        etag = self.client.get('/api/products/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.update(price=200)
+            Product.objects.first().save()
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_errors_have_no_validators(self):
+        response = self.client.get('/api/products/', {'limit': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+
+class CatalogCacheTest(StarBurgerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.catalog_cache = CatalogCache('test', lru_size=1, timeout=60)
+
+    def test_counts_hits_by_tier_and_misses(self):
+        version = get_catalog_version()
+        self.assertIsNone(self.catalog_cache.get('menu', version))
+        self.catalog_cache.set('menu', b'[]', version)
+        self.catalog_cache.get('menu', version)
+        # Another worker has an empty in-process tier
+        self.catalog_cache.local_cache.clear()
+        self.catalog_cache.get('menu', version)
+        self.catalog_cache.get('menu', version)
+
+        self.assertEqual(self.catalog_cache.get_stats(), {
+            'local_hits': 2,
+            'shared_hits': 1,
+            'misses': 1,
+            'local_size': 1,
+        })
+
+    def test_evicted_entries_are_read_from_the_shared_cache(self):
+        version = get_catalog_version()
+        self.catalog_cache.set('menu', b'[1]', version)
+        self.catalog_cache.set('banners', b'[2]', version)
+
+        self.assertEqual(self.catalog_cache.get('menu', version), b'[1]')
+        self.assertEqual(self.catalog_cache.get_stats()['shared_hits'], 1)
+        self.assertEqual(self.catalog_cache.get('menu', version), b'[1]')
+        self.assertEqual(self.catalog_cache.get_stats()['local_hits'], 1)
+
+    def test_catalog_change_invalidates_after_commit(self):
+        builds = []
+
+        def build():
+            builds.append(Product.objects.count())
+            return builds[-1]
+
+        self.catalog_cache.get_or_set('menu', build)
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Чизбургер', price=150)
+            # Not committed yet, the cached payload is still the current one
+            self.assertEqual(self.catalog_cache.get_or_set('menu', build), 0)
+
+        self.assertEqual(self.catalog_cache.get_or_set('menu', build), 1)
+        self.assertEqual(builds, [0, 1])
+
+
+class ProductListJsonTest(StarBurgerTestCase):
+    def make_rows(self, count):
+        return [
+            {
+                'id': number,
+                'name': f'Бургер {number}',
+                'price': Decimal('150.50'),
+                'special_status': bool(number % 2),
+                'description': 'Сочный',
+                'category_id': 1 if number % 2 else None,
+                'category__name': 'Бургеры' if number % 2 else None,
+                'image': 'burger.0123456789ab.jpg' if number % 2 else '',
+            }
+            for number in range(count)
+        ]
+
+    def test_rows_are_serialized_with_urls(self):
+        products = json.loads(b''.join(iter_product_list_json(self.make_rows(2))))
+
+        self.assertEqual(products, [
+            {
+                'id': 0,
+                'name': 'Бургер 0',
+                'price': '150.50',
+                'special_status': False,
+                'description': 'Сочный',
+                'category': None,
+                'image': None,
+                'image_renditions': None,
+            },
+            {
+                'id': 1,
+                'name': 'Бургер 1',
+                'price': '150.50',
+                'special_status': True,
+                'description': 'Сочный',
+                'category': {'id': 1, 'name': 'Бургеры'},
+                'image': '/media/burger.0123456789ab.jpg',
+                'image_renditions': get_rendition_urls('burger.0123456789ab.jpg'),
+            },
+        ])
+
+    def test_chunks_join_into_the_dumped_list(self):
+        for count in [0, 1, PRODUCTS_PER_CHUNK, PRODUCTS_PER_CHUNK + 1]:
+            for pretty in [False, True]:
+                with self.subTest(count=count, pretty=pretty):
+                    rows = self.make_rows(count)
+                    expected_json = dump_json([serialize_product_row(row, '/media/') for row in rows], pretty=pretty)
+
+                    chunks = list(iter_product_list_json(rows, pretty=pretty))
+
+                    self.assertEqual(b''.join(chunks).decode(), expected_json)
+                    # The closing bracket follows the last full chunk
+                    self.assertEqual(len(chunks), count // PRODUCTS_PER_CHUNK + 1)
+
+    def test_pretty_list_is_cached_apart_from_compact(self):
+        restaurant = Restaurant.objects.create(name='Star Burger Арбат')
+        product = Product.objects.create(name='Чизбургер', price=150)
+        RestaurantMenuItem.objects.create(restaurant=restaurant, product=product)
+
+        for query in [{}, {'pretty': '1'}]:
+            with self.subTest(query=query):
+                # The stream is cached once it has been read through
+                streamed_content = b''.join(self.client.get('/api/products/', query).streaming_content)
+                cached_response = self.client.get('/api/products/', query)
+
+                self.assertEqual(cached_response.content, streamed_content)
+                self.assertEqual(json.loads(streamed_content)[0]['name'], 'Чизбургер')
+                self.assertEqual(b'\n' in streamed_content, bool(query))
+
+
+# Products by in_bulk, the savepoint, the order, its items and the release
+REGISTER_ORDER_QUERIES = 5
+
+
+@override_settings(ORDER_QUEUE_ENABLED=False)
+class RegisterOrderTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [Product.objects.create(name=f'Бургер {number}', price=100 + number) for number in range(30)]
+
+    def post_order(self, products, **headers):
+        payload = {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79001234567',
+            'address': 'Москва, Тверская, 1',
+            'products': [{'product': product.id, 'quantity': 2} for product in products],
+        }
+        return self.client.post('/api/order/', json.dumps(payload), content_type='application/json', **headers)
+
+    def test_query_count_does_not_grow_with_cart(self):
+        for products in [self.products[:1], self.products]:
+            with self.subTest(items=len(products)), self.assertNumQueries(REGISTER_ORDER_QUERIES):
+                response = self.post_order(products)
+            self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(OrderItem.objects.filter(order_id=response.json()['id']).count(), 30)
+
+    def test_retry_returns_the_same_order(self):
+        first_response = self.post_order(self.products[:2], HTTP_IDEMPOTENCY_KEY='retry')
+        second_response = self.post_order(self.products[:2], HTTP_IDEMPOTENCY_KEY='retry')
+
+        self.assertEqual(second_response.status_code, 201)
+        self.assertEqual(second_response.json()['id'], first_response.json()['id'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_product_deleted_after_validation_is_a_client_error(self):
+        # On commit the deferred foreign key check fails the same way
+        with patch('foodcartapp.views.create_order', side_effect=IntegrityError):
+            response = self.post_order(self.products[:2])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('products', response.json()['errors'])
+
+    def test_address_is_not_geocoded_in_the_request(self):
+        with patch('places.coordinates.get_geocoder') as get_geocoder:
+            self.post_order(self.products[:1])
+
+        get_geocoder.assert_not_called()
+
+    @override_settings(GEOCODER_BACKEND='places.geocoders.OfflineGeocoder')
+    def test_geocode_orders_resolves_unprocessed_orders(self):
+        self.post_order(self.products[:1])
+
+        call_command('geocode_orders', stdout=io.StringIO())
+
+        self.assertTrue(Place.objects.filter(address=normalize_address('Москва, Тверская, 1'), lat__isnull=False).exists())
+
+
+class OrderQueueTest(StarBurgerTestCase):
+    def setUp(self):
+        super().setUp()
+        queue_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(queue_dir.cleanup)
+        self.queue = OrderQueue(os.path.join(queue_dir.name, 'order_queue.sqlite3'))
+        self.addCleanup(self.queue.close)
+
+        category = ProductCategory.objects.create(name='Бургеры')
+        self.product = Product.objects.create(name='Чизбургер', category=category, price=150)
+        self.deleted_product = Product.objects.create(name='Гамбургер', category=category, price=100)
+
+    def enqueue(self, order_key, product):
+        order_data = parse_order_payload({
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79001234567',
+            'address': 'Москва, Тверская, 1',
+            'products': [{'product': product.id, 'quantity': 1}],
+        })
+        order_data['created_at'] = timezone.now()
+        self.queue.enqueue(order_key, order_data)
+
+    def process_queue(self):
+        with patch('foodcartapp.management.commands.process_order_queue.get_order_queue', return_value=self.queue):
+            call_command('process_order_queue', once=True, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_order_with_deleted_product_does_not_block_the_queue(self):
+        self.enqueue('deleted', self.deleted_product)
+        self.enqueue('valid', self.product)
+        deleted_product_id = self.deleted_product.id
+        self.deleted_product.delete()
+
+        self.process_queue()
+        self.process_queue()
+
+        self.assertQuerysetEqual(Order.objects.values_list('order_key', flat=True), ['valid'])
+        stats = self.queue.get_stats()
+        self.assertEqual(stats['depth'], 0)
+        self.assertEqual(stats['failed'], 1)
+        failed_entry, = self.queue.fetch_failed(10)
+        self.assertEqual(failed_entry['order_key'], 'deleted')
+        self.assertIn(str(deleted_product_id), failed_entry['error'])
+
+    @override_settings(GEOCODER_BACKEND='places.geocoders.OfflineGeocoder')
+    def test_worker_geocodes_accepted_orders(self):
+        self.enqueue('valid', self.product)
+
+        self.process_queue()
+
+        self.assertTrue(Place.objects.filter(address=normalize_address('Москва, Тверская, 1'), lat__isnull=False).exists())
+
+
+# Plan fragments meaning the whole table is read or sorted to serve one page
+BAD_PLAN_MARKERS = {
+    'sqlite': ['SCAN foodcartapp_product', 'TEMP B-TREE'],
+    'postgresql': ['Seq Scan on foodcartapp_product', 'Sort'],
+}
+
+
+class ProductPagePlanTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ProductCategory.objects.create(name='Бургеры')
+        drinks = ProductCategory.objects.create(name='Напитки')
+        Product.objects.bulk_create([
+            Product(name=f'Товар {number}', category=category, price=100 + number, special_status=number % 5 == 0)
+            for number, category in enumerate([cls.category, drinks, None] * 10)
+        ])
+
+    def explain_page(self, **query):
+        if connection.vendor == 'postgresql':
+            # A table this small is cheaper to scan, ask whether an ordered index path exists at all
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off; SET LOCAL enable_bitmapscan = off; SET LOCAL enable_sort = off')
+        plan = get_product_page_queryset(**query).explain()
+        return ' | '.join(line.strip() for line in plan.splitlines())
+
+    def test_pages_are_read_by_index_in_id_order(self):
+        queries = [
+            {'category_id': self.category.id},
+            {'category_id': self.category.id, 'special_status': True, 'cursor': 1},
+            {'special_status': True},
+            {'uncategorized': True},
+        ]
+        for query in queries:
+            plan = self.explain_page(**query)
+            for marker in BAD_PLAN_MARKERS.get(connection.vendor, []):
+                with self.subTest(query=query, marker=marker):
+                    self.assertNotIn(marker, plan)
+
+
+class AvailabilityIndexTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name='Star Burger Арбат')
+        cls.product = Product.objects.create(name='Чизбургер', price=150)
+        RestaurantMenuItem.objects.create(restaurant=cls.restaurant, product=cls.product)
+
+    def test_index_is_patched_in_place(self):
+        index = get_availability_index()
+
+        apply_catalog_change([(self.restaurant.id, self.product.id, False)])
+
+        self.assertIs(get_availability_index(), index)
+        self.assertFalse(index.is_available(self.product.id, self.restaurant.id))
+
+    def test_index_is_reloaded_after_a_concurrent_bump(self):
+        index = get_availability_index()
+        # Another process changed the catalog right before this one bumps
+        bump_catalog_version()
+
+        apply_catalog_change([(self.restaurant.id, self.product.id, False)])
+
+        self.assertIsNot(get_availability_index(), index)
+
+    def test_public_catalog_is_served_from_the_index(self):
+        other_product = Product.objects.create(name='Чизбургер двойной', price=250)
+        RestaurantMenuItem.objects.create(restaurant=self.restaurant, product=other_product)
+        get_availability_index()
+        # The index alone learns of the change, the menu items still say available
+        apply_catalog_change([(self.restaurant.id, self.product.id, False)])
+
+        products = json.loads(b''.join(self.client.get('/api/products/').streaming_content))
+        categories = self.client.get('/api/categories/').json()
+        suggestions = self.client.get('/api/products/autocomplete/', {'q': 'чиз'}).json()
+
+        self.assertEqual([product['id'] for product in products], [other_product.id])
+        self.assertEqual([category['products_count'] for category in categories], [1])
+        self.assertEqual([suggestion['id'] for suggestion in suggestions], [other_product.id])
+
+    def test_moved_menu_item_leaves_its_old_restaurant(self):
+        other_restaurant = Restaurant.objects.create(name='Star Burger Тверская')
+        index = get_availability_index()
+        self.assertTrue(index.is_available(self.product.id, self.restaurant.id))
+
+        menu_item = RestaurantMenuItem.objects.get(restaurant=self.restaurant, product=self.product)
+        menu_item.restaurant = other_restaurant
+        with self.captureOnCommitCallbacks(execute=True):
+            menu_item.save()
+
+        index = get_availability_index()
+        self.assertFalse(index.is_available(self.product.id, self.restaurant.id))
+        self.assertTrue(index.is_available(self.product.id, other_restaurant.id))
+        self.assertQuerysetEqual(
+            RestaurantMenuEntry.objects.values_list('restaurant_id', flat=True),
+            [other_restaurant.id],
+        )
+
+
+class MenuAvailabilityTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurants = [Restaurant.objects.create(name=f'Star Burger {number}') for number in range(2)]
+        cls.products = [Product.objects.create(name=f'Бургер {number}', price=100) for number in range(20)]
+        RestaurantMenuItem.objects.create(restaurant=cls.restaurants[0], product=cls.products[0])
+        RestaurantMenuItem.objects.create(restaurant=cls.restaurants[1], product=cls.products[0], availability=False)
+
+    def set_availability(self, products, available):
+        restaurant_ids = [restaurant.id for restaurant in self.restaurants]
+        with self.captureOnCommitCallbacks(execute=True):
+            return set_menu_availability(restaurant_ids, [product.id for product in products], available)
+
+    def get_available_pairs(self):
+        return set(RestaurantMenuItem.objects.filter(availability=True).values_list('restaurant_id', 'product_id'))
+
+    def test_changed_count(self):
+        products = self.products[:2]
+
+        # One item switched on and two created, the available one is left alone
+        self.assertEqual(self.set_availability(products, True), 3)
+        self.assertEqual(self.set_availability(products, True), 0)
+        self.assertEqual(self.set_availability(products, False), 4)
+        self.assertEqual(self.set_availability(products, False), 0)
+
+    def test_batch_reaches_every_read_model(self):
+        self.set_availability(self.products[:2], True)
+
+        available_pairs = {(restaurant.id, product.id) for restaurant in self.restaurants for product in self.products[:2]}
+        self.assertEqual(self.get_available_pairs(), available_pairs)
+        self.assertEqual(
+            set(RestaurantMenuEntry.objects.values_list('restaurant_id', 'product_id')),
+            available_pairs,
+        )
+        menu = self.client.get(f'/api/restaurants/{self.restaurants[1].id}/menu/').json()
+        self.assertEqual({product['id'] for product in menu}, {product.id for product in self.products[:2]})
+        self.assertTrue(get_availability_index().is_available(self.products[1].id, self.restaurants[1].id))
+
+    def test_query_count_does_not_grow_with_products(self):
+        query_counts = []
+        for products in [self.products[1:3], self.products[3:]]:
+            with CaptureQueriesContext(connection) as queries:
+                self.set_availability(products, True)
+            query_counts.append(len(queries))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_admin_action_reports_changed_count(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+        response = self.client.post(
+            reverse('admin:foodcartapp_product_changelist'),
+            {'action': 'make_unavailable_everywhere', '_selected_action': [self.products[0].id]},
+            follow=True,
+        )
+
+        self.assertEqual([str(message) for message in response.context['messages']], ['Изменено пунктов меню: 1'])
+        self.assertEqual(self.get_available_pairs(), set())
+
+
+class AdminQueryCountTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        category = ProductCategory.objects.create(name='Бургеры')
+        cls.products = [
+            Product.objects.create(name=f'Бургер {number}', category=category, price=100 + number)
+            for number in range(10)
+        ]
+        cls.restaurant = cls.create_restaurants(3)[0]
+        cls.order = Order.objects.create(
+            firstname='Иван',
+            lastname='Петров',
+            phonenumber='+79001234567',
+            address='Москва, Тверская, 1',
+            restaurant=cls.restaurant,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=cls.order, product=product, quantity=1, price=product.price)
+            for product in cls.products
+        ])
+
+    @classmethod
+    def create_restaurants(cls, count):
+        first_number = Restaurant.objects.count()
+        Restaurant.objects.bulk_create([
+            Restaurant(name=f'Star Burger {number}') for number in range(first_number, first_number + count)
+        ])
+        restaurants = list(Restaurant.objects.order_by('id')[first_number:])
+        RestaurantMenuItem.objects.bulk_create([
+            RestaurantMenuItem(restaurant=restaurant, product=product)
+            for restaurant in restaurants
+            for product in cls.products
+        ])
+        return restaurants
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def assert_admin_pages_query_counts(self):
+        # Change pages run in a transaction, its savepoint and release count too
+        pages = [
+            (f'/admin/foodcartapp/product/{self.products[0].id}/change/', 10),
+            (f'/admin/foodcartapp/restaurant/{self.restaurant.id}/change/', 9),
+            (f'/admin/foodcartapp/order/{self.order.id}/change/', 10),
+            ('/admin/foodcartapp/product/', 6),
+        ]
+        for path, queries_count in pages:
+            # Change pages look their content type up once per process
+            ContentType.objects.clear_cache()
+            with self.subTest(path=path), self.assertNumQueries(queries_count):
+                response = self.client.get(path)
+                self.assertEqual(response.status_code, 200)
+
+    def test_query_counts_do_not_grow_with_restaurants(self):
+        self.assert_admin_pages_query_counts()
+
+        self.create_restaurants(20)
+        self.assert_admin_pages_query_counts()
+
+
+class ProductAdminSearchTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        cls.burger = Product.objects.create(name='Чизбургер', price=150)
+        cls.salad = Product.objects.create(name='Салат', price=100, description='Лучше всего с чизбургером')
+        Product.objects.create(name='Кола', price=80)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def search(self, **params):
+        response = self.client.get(reverse('admin:foodcartapp_product_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, list(response.context['cl'].result_list)
+
+    def test_results_are_ranked_without_explicit_ordering(self):
+        _, products = self.search(q='ЧИЗБУРГЕР')
+
+        self.assertEqual(products, [self.burger, self.salad])
+
+    def test_explicit_ordering_wins_over_rank(self):
+        # Column 2 is the name, after the action checkbox and the preview
+        _, products = self.search(q='чизбургер', o='2')
+
+        self.assertEqual(products, [self.salad, self.burger])
+
+    def test_preview_links_to_the_change_page(self):
+        # No post_save, so no renditions are generated for a file that is not there
+        Product.objects.filter(pk=self.burger.pk).update(image='burger.jpg')
+
+        response, _ = self.search(q='чизбургер')
+
+        self.assertContains(response, f'<a href="{reverse("admin:foodcartapp_product_change", args=[self.burger.id])}">')
+
+
+class ImageRenditionsTest(StarBurgerTestCase):
+    def test_missing_image_does_not_break_saving(self):
+        with self.assertLogs('foodcartapp.signals', 'ERROR'):
+            product = Product.objects.create(name='Чизбургер', price=150, image='x.jpg')
+
+        self.assertTrue(Product.objects.filter(pk=product.pk).exists())
+
+
+# Static files go through the manifest storage that production uses
+@override_settings(DEBUG=False, STATICFILES_STORAGE=settings.STATICFILES_STORAGE)
+class AssetCachingTest(StarBurgerTestCase):
+    def setUp(self):
+        super().setUp()
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+
+        # What collectstatic leaves behind: a hashed copy and the manifest naming it
+        with open(os.path.join(static_root.name, 'app.0123456789ab.js'), 'w') as static_file:
+            static_file.write('console.log("star burger")')
+        with open(os.path.join(static_root.name, 'staticfiles.json'), 'w') as manifest_file:
+            json.dump({'version': '1.0', 'paths': {'app.js': 'app.0123456789ab.js'}}, manifest_file)
+
+        for name in ['burger.0123456789ab.jpg', 'burger.jpg']:
+            with open(os.path.join(media_root.name, name), 'wb') as media_file:
+                media_file.write(b'jpeg')
+
+        roots = override_settings(STATIC_ROOT=static_root.name, MEDIA_ROOT=media_root.name)
+        roots.enable()
+        self.addCleanup(roots.disable)
+
+    def test_hashed_static_files_are_immutable(self):
+        self.assertEqual(static('app.js'), '/static/app.0123456789ab.js')
+
+        response = self.client.get('/static/app.0123456789ab.js')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_hashed_media_files_are_immutable(self):
+        request_factory = RequestFactory()
+
+        response = serve_media(request_factory.get('/media/burger.0123456789ab.jpg'), 'burger.0123456789ab.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(f'max-age={IMMUTABLE_MAX_AGE}', response['Cache-Control'])
+
+        response = serve_media(request_factory.get('/media/burger.jpg'), 'burger.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Cache-Control', response)
+
+    def test_banners_api_returns_hashed_urls(self):
+        Banner.objects.bulk_create([Banner(title='Скидка', image='banners/burger.0123456789ab.jpg')])
+
+        banners = self.client.get('/api/banners/').json()
+
+        self.assertEqual([banner['title'] for banner in banners], ['Скидка'])
+        for banner in banners:
+            urls = [banner['src'], *(candidate.split()[0] for candidate in banner['srcset'].split(', '))]
+            for url in urls:
+                self.assertRegex(url, HASHED_MEDIA_NAME_RE)
+
+
+class DemoCatalogTest(StarBurgerTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_root_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_root_override.enable()
+        self.addCleanup(media_root_override.disable)
+
+    def test_loads_banners_with_renditions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('load_demo_catalog', stdout=io.StringIO())
+
+        banners = self.client.get('/api/banners/').json()
+
+        self.assertEqual([banner['title'] for banner in banners], ['Burger', 'Spices', 'New York'])
+        for banner in Banner.objects.all():
+            for rendition in BANNER_RENDITIONS:
+                self.assertTrue(default_storage.exists(get_rendition_name(banner.image.name, rendition)))
+
+    def test_banners_are_skipped_without_images(self):
+        call_command('load_demo_catalog', no_images=True, stdout=io.StringIO())
+
+        self.assertFalse(Banner.objects.exists())
+        self.assertTrue(Product.objects.exists())
+
+
+class CatalogImportTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        burgers = ProductCategory.objects.create(name='Бургеры')
+        restaurant = Restaurant.objects.create(name='Star Burger Арбат', address='Москва, Арбат, 1')
+        products = [
+            Product.objects.create(name='Бургер', category=burgers, price='100.00', special_status=True),
+            Product.objects.create(name='Салат', price='50.50', description='Свежий'),
+        ]
+        for product in products:
+            RestaurantMenuItem.objects.create(restaurant=restaurant, product=product, availability=product.special_status)
+
+    def setUp(self):
+        super().setUp()
+        catalog_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(catalog_dir.cleanup)
+        self.catalog_dir = catalog_dir.name
+
+    def read_catalog(self, directory, file_format):
+        catalog = {}
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), encoding='utf-8') as catalog_file:
+                # Rows created by one bulk query may come back in any order
+                catalog[name] = sorted(catalog_file)
+        return catalog
+
+    def write_products(self, *lines):
+        with open(os.path.join(self.catalog_dir, 'products.csv'), 'w', encoding='utf-8') as products_file:
+            products_file.write('name,category,price,special_status,description,image\n')
+            products_file.writelines(f'{line}\n' for line in lines)
+
+    def import_catalog(self, directory, file_format='csv'):
+        importer = CatalogImporter(directory, file_format)
+        with self.captureOnCommitCallbacks(execute=True):
+            importer.run()
+        return importer
+
+    def test_export_and_import_round_trip(self):
+        for file_format in ['csv', 'jsonl']:
+            with self.subTest(file_format=file_format):
+                export_dir = os.path.join(self.catalog_dir, file_format)
+                export_catalog(export_dir, file_format)
+                exported_catalog = self.read_catalog(export_dir, file_format)
+                RestaurantMenuItem.objects.all().delete()
+                Product.objects.all().delete()
+                ProductCategory.objects.all().delete()
+                Restaurant.objects.all().delete()
+
+                importer = self.import_catalog(export_dir, file_format)
+                export_catalog(export_dir, file_format)
+
+                self.assertEqual(len(exported_catalog), 4)
+                self.assertEqual(self.read_catalog(export_dir, file_format), exported_catalog)
+                self.assertEqual(importer.created_counts['menu_items'], 2)
+                self.assertEqual(sum(importer.updated_counts.values()), 0)
+
+    def test_upsert_counts_created_and_updated_rows(self):
+        self.write_products(
+            'Бургер,Бургеры,120,true,,',
+            'Салат,,50.50,false,Свежий,',
+            'Картофель фри,Закуски,70,false,,',
+        )
+
+        importer = self.import_catalog(self.catalog_dir)
+
+        self.assertEqual(importer.created_counts, {'products': 1, 'categories': 1})
+        self.assertEqual(importer.updated_counts, {'products': 1})
+        self.assertEqual(Product.objects.get(name='Бургер').price, 120)
+        self.assertEqual(Product.objects.count(), 3)
+
+    def test_invalid_price_is_rejected_with_its_row(self):
+        for price in ['NaN', 'Infinity', '-1', '', 'сто']:
+            with self.subTest(price=price):
+                self.write_products('Бургер,Бургеры,100,true,,', f'Салат,,{price},false,,')
+
+                with self.assertRaisesRegex(CatalogImportError, r'products\.csv:3: price'):
+                    self.import_catalog(self.catalog_dir)
+
+                self.assertEqual(Product.objects.get(name='Бургер').price, 100)
+
+
+class DailySalesRollupTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant = Restaurant.objects.create(name='Star Burger Арбат')
+        cls.burger = Product.objects.create(name='Бургер', price=100)
+        cls.fries = Product.objects.create(name='Картофель фри', price=50)
+
+        today = timezone.localtime(timezone.now(), get_sales_timezone()).date()
+        cls.first_day = today - datetime.timedelta(days=3)
+        cls.second_day = today - datetime.timedelta(days=2)
+        cls.unassigned_order = cls.create_order(cls.first_day, None, [(cls.burger, 1, 100)])
+        cls.create_order(cls.first_day, cls.restaurant, [(cls.burger, 2, 90), (cls.fries, 1, 50)])
+        cls.create_order(cls.first_day, cls.restaurant, [(cls.fries, 3, 40)])
+        cls.create_order(cls.second_day, cls.restaurant, [(cls.fries, 5, 50)])
+
+    @classmethod
+    def create_order(cls, day, restaurant, items):
+        order = Order.objects.create(
+            firstname='Иван',
+            lastname='Петров',
+            phonenumber='+79001234567',
+            address='Москва, Тверская, 1',
+            restaurant=restaurant,
+            created_at=get_day_start(day) + datetime.timedelta(hours=12),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, price=price)
+            for product, quantity, price in items
+        ])
+        return order
+
+    def get_rolled_up_sales(self):
+        return set(
+            DailySales.objects
+            .values_list('date', 'restaurant', 'product', 'quantity', 'revenue', 'orders_count')
+        )
+
+    def test_rollup_fills_every_column(self):
+        days, rows_count = rollup_daily_sales()
+
+        self.assertEqual(days[0], self.first_day)
+        self.assertEqual(rows_count, 4)
+        self.assertEqual(self.get_rolled_up_sales(), {
+            (self.first_day, None, self.burger.id, 1, 100, 1),
+            (self.first_day, self.restaurant.id, self.burger.id, 2, 180, 1),
+            (self.first_day, self.restaurant.id, self.fries.id, 4, 170, 2),
+            (self.second_day, self.restaurant.id, self.fries.id, 5, 250, 1),
+        })
+        self.assertFalse(DailySales.objects.filter(rolled_up_at__isnull=True).exists())
+
+    def test_rerun_changes_nothing(self):
+        rollup_daily_sales()
+        rolled_up_sales = self.get_rolled_up_sales()
+
+        self.assertEqual(rollup_daily_sales(), ([], 0))
+        rollup_daily_sales(since=self.first_day)
+
+        self.assertEqual(self.get_rolled_up_sales(), rolled_up_sales)
+        self.assertEqual(DailySales.objects.count(), 4)
+
+    def test_restaurant_assigned_after_rollup_gets_the_sales(self):
+        rollup_daily_sales()
+        self.unassigned_order.restaurant = self.restaurant
+        self.unassigned_order.save()
+
+        days, _ = rollup_daily_sales()
+
+        self.assertEqual(days, [self.first_day])
+        self.assertIn((self.first_day, self.restaurant.id, self.burger.id, 3, 280, 2), self.get_rolled_up_sales())
+        self.assertFalse(DailySales.objects.filter(restaurant__isnull=True).exists())
+
+    def test_edited_item_rerolls_its_day(self):
+        rollup_daily_sales()
+        item = OrderItem.objects.get(product=self.fries, quantity=5)
+        item.quantity = 6
+        item.save()
+
+        days, _ = rollup_daily_sales()
+
+        self.assertEqual(days, [self.second_day])
+        self.assertIn((self.second_day, self.restaurant.id, self.fries.id, 6, 300, 1), self.get_rolled_up_sales())
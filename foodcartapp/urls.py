@@ -1,12 +1,24 @@
 from django.urls import path
 
-from .views import product_list_api, banners_list_api, register_order
+from .views import (
+    banners_list_api,
+    category_summary_api,
+    product_autocomplete_api,
+    product_list_api,
+    product_search_api,
+    register_order,
+    restaurant_menu_api,
+)
 
 
 app_name = "foodcartapp"
 
 urlpatterns = [
     path('products/', product_list_api),
+    path('products/search/', product_search_api),
+    path('products/autocomplete/', product_autocomplete_api),
+    path('categories/', category_summary_api),
+    path('restaurants/<int:restaurant_id>/menu/', restaurant_menu_api),
     path('banners/', banners_list_api),
     path('order/', register_order),
 ]
@@ -1,62 +1,205 @@
-from django.http import JsonResponse
-from django.templatetags.static import static
+import json
+from functools import wraps
 
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 
-from .models import Product
 
+from star_burger.db_routers import use_read_database
 
+from .availability import get_availability_index
+from .catalog import (
+    PAGE_QUERY_PARAMS,
+    CatalogQueryError,
+    dump_category_summary_json,
+    dump_product_page_json,
+    get_category_summary,
+    get_product_page,
+    parse_product_page_query,
+)
+from .media import get_media_url_prefix
+from .menu_cache import get_catalog_etag, get_catalog_last_modified, get_catalog_version, menu_cache
+from .models import Banner, Order, Product, Restaurant
+from .order_queue import get_order_queue
+from .orders import OrderValidationError, clean_order_key, create_order, parse_order_payload
+from .restaurant_menus import dump_restaurant_menu_json
+from .search import get_product_trie, search_product_ids
+from .serializers import PRODUCT_LIST_FIELDS, dump_banner_list_json, dump_json, iter_product_list_json, serialize_product_row
+
+
+def catalog_condition(view):
+    """Answer conditional GETs by the catalog version, without running the view.
+
+    Clients must revalidate on every load, the answer is a cheap 304 until the
+    catalog changes. Errors are not a representation of the catalog, so they
+    get no validators.
+    """
+    conditional_view = condition(etag_func=get_catalog_etag, last_modified_func=get_catalog_last_modified)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = conditional_view(request, *args, **kwargs)
+        if response.status_code not in {200, 304}:
+            response.headers.pop('ETag', None)
+            response.headers.pop('Last-Modified', None)
+        return response
+    return wrapper
+
+
+@cache_control(no_cache=True)
+@catalog_condition
+@use_read_database
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    content = menu_cache.get_or_set(
+        'banners',
+        lambda: dump_banner_list_json(Banner.objects.filter(active=True).only('title', 'text', 'image')),
+    )
+    return HttpResponse(content, content_type='application/json')
 
 
+@cache_control(no_cache=True)
+@catalog_condition
+@use_read_database
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
-            }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    if PAGE_QUERY_PARAMS & request.GET.keys():
+        return _product_page_response(request)
+
+    pretty = request.GET.get('pretty') == '1'
+    cache_name = 'products:pretty' if pretty else 'products'
+
+    version = get_catalog_version()
+    content = menu_cache.get(cache_name, version)
+    if content is not None:
+        return HttpResponse(content, content_type='application/json')
+
+    products = get_availability_index().filter_available(Product.objects.values(*PRODUCT_LIST_FIELDS).iterator())
+    chunks = iter_product_list_json(products, pretty=pretty)
+    return StreamingHttpResponse(
+        menu_cache.stream_and_set(cache_name, chunks, version),
+        content_type='application/json',
+    )
+
+
+def _product_page_response(request):
+    try:
+        query = parse_product_page_query(request.GET)
+    except CatalogQueryError as error:
+        return JsonResponse({'errors': error.errors}, status=400, json_dumps_params={'ensure_ascii': False})
+
+    def build():
+        return dump_product_page_json(*get_product_page(**query))
+
+    if query['cursor'] is not None:
+        return HttpResponse(build(), content_type='application/json')
+    # First pages are what every visitor loads, the rest are not worth the cache space
+    cache_name = 'products:page:{category_id}:{uncategorized}:{special_status}:{limit}'.format(**query)
+    return HttpResponse(menu_cache.get_or_set(cache_name, build), content_type='application/json')
+
+
+@cache_control(no_cache=True)
+@catalog_condition
+@use_read_database
+def category_summary_api(request):
+    content = menu_cache.get_or_set(
+        'categories',
+        lambda: dump_category_summary_json(get_category_summary()),
+    )
+    return HttpResponse(content, content_type='application/json')
+
 
+@cache_control(no_cache=True)
+@catalog_condition
+@use_read_database
+def restaurant_menu_api(request, restaurant_id):
+    def build():
+        if not Restaurant.objects.filter(pk=restaurant_id).exists():
+            raise Http404('Ресторан не найден')
+        return dump_restaurant_menu_json(restaurant_id)
 
+    content = menu_cache.get_or_set(f'restaurants:{restaurant_id}:menu', build)
+    return HttpResponse(content, content_type='application/json')
+
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+
+def _parse_limit(value, default=SEARCH_DEFAULT_LIMIT):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(limit, 1), SEARCH_MAX_LIMIT)
+
+
+@cache_control(no_cache=True)
+@catalog_condition
+@use_read_database
+def product_search_api(request):
+    product_ids = search_product_ids(request.GET.get('q', ''), limit=_parse_limit(request.GET.get('limit')))
+    rows = Product.objects.filter(id__in=product_ids).values(*PRODUCT_LIST_FIELDS)
+    rows_by_id = {row['id']: row for row in rows}
+
+    media_url_prefix = get_media_url_prefix()
+    products = [
+        serialize_product_row(rows_by_id[product_id], media_url_prefix)
+        for product_id in product_ids
+        if product_id in rows_by_id
+    ]
+    return HttpResponse(dump_json(products), content_type='application/json')
+
+
+@cache_control(no_cache=True)
+@catalog_condition
+@use_read_database
+def product_autocomplete_api(request):
+    suggestions = get_product_trie().complete(request.GET.get('q', ''), limit=_parse_limit(request.GET.get('limit'), 10))
+    return HttpResponse(
+        dump_json([{'id': product_id, 'name': name} for product_id, name in suggestions]),
+        content_type='application/json',
+    )
+
+
+@require_POST
 def register_order(request):
-    # TODO это лишь заглушка
-    return JsonResponse({})
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse(
+            {'error': 'Тело запроса должно быть в формате JSON.'},
+            status=400,
+            json_dumps_params={'ensure_ascii': False},
+        )
+
+    try:
+        order_data = parse_order_payload(payload)
+        order_data['order_key'] = clean_order_key(
+            request.headers.get('Idempotency-Key') or payload.get('order_key')
+        )
+    except OrderValidationError as error:
+        return JsonResponse({'errors': error.errors}, status=400, json_dumps_params={'ensure_ascii': False})
+
+    order_data['created_at'] = timezone.now()
+
+    if not settings.ORDER_QUEUE_ENABLED:
+        try:
+            order = create_order(order_data)
+        except IntegrityError:
+            # Either the client retried with the same key and the order already
+            # exists, or a product was deleted after the order was validated
+            order = Order.objects.filter(order_key=order_data['order_key']).first()
+            if order is None:
+                return JsonResponse(
+                    {'errors': {'products': 'Некоторых товаров больше нет в меню, обновите корзину.'}},
+                    status=400,
+                    json_dumps_params={'ensure_ascii': False},
+                )
+        # The address is geocoded off the request path, by geocode_orders
+        return JsonResponse({'id': order.id, 'order_key': order.order_key}, status=201)
+
+    get_order_queue().enqueue(order_data['order_key'], order_data)
+    return JsonResponse({'order_key': order_data['order_key']}, status=201)
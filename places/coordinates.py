@@ -0,0 +1,101 @@
+import logging
+import re
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+
+from foodcartapp.menu_cache import LRUCache
+
+from .geocoders import get_geocoder
+from .models import Place
+
+
+logger = logging.getLogger(__name__)
+
+memory_cache = LRUCache(settings.PLACES_LRU_SIZE)
+
+
+def normalize_address(address):
+    address = address.casefold().replace('ё', 'е')
+    address = re.sub(r'\s+', ' ', address)
+    address = re.sub(r'\s*,\s*', ', ', address)
+    return address.strip(' ,.;')
+
+
+def _get_expiration_time(coordinates, updated_at):
+    ttl = settings.PLACES_TTL if coordinates else settings.PLACES_NEGATIVE_TTL
+    return updated_at + timedelta(seconds=ttl)
+
+
+def fetch_coordinates(addresses, refresh=False, geocode=True):
+    """Return {address: (lat, lon) or None} for the given addresses.
+
+    Lookups go through an in-process LRU, then one query for all remaining
+    addresses, and only addresses that are unknown or expired reach the
+    geocoder. Addresses the geocoder could not find are cached too, with a
+    shorter TTL. If the geocoder is down, expired coordinates are still used.
+    With geocode=False, or when no geocoder is configured, only the cache
+    is read and unknown addresses are None.
+    """
+    now = timezone.now()
+    normalized_addresses = {
+        address: normalize_address(address)
+        for address in addresses if address and normalize_address(address)
+    }
+
+    found_coordinates = {}
+    for normalized_address in set(normalized_addresses.values()):
+        cached = None if refresh else memory_cache.get(normalized_address)
+        if cached is None:
+            continue
+        coordinates, expires_at = cached
+        if expires_at > now:
+            found_coordinates[normalized_address] = coordinates
+
+    missing_addresses = set(normalized_addresses.values()) - found_coordinates.keys()
+    stale_places = {}
+    if missing_addresses:
+        for place in Place.objects.filter(address__in=missing_addresses):
+            expires_at = _get_expiration_time(place.coordinates, place.updated_at)
+            if expires_at > now and not refresh:
+                found_coordinates[place.address] = place.coordinates
+                memory_cache.set(place.address, (place.coordinates, expires_at))
+            else:
+                stale_places[place.address] = place
+
+    unresolved_addresses = set(normalized_addresses.values()) - found_coordinates.keys()
+    geocoder = get_geocoder() if geocode and unresolved_addresses else None
+    if geocoder is None:
+        for normalized_address in unresolved_addresses:
+            stale_place = stale_places.get(normalized_address)
+            found_coordinates[normalized_address] = stale_place.coordinates if stale_place else None
+    else:
+        new_places = []
+        refreshed_places = []
+        for normalized_address in unresolved_addresses:
+            stale_place = stale_places.get(normalized_address)
+            try:
+                coordinates = geocoder.geocode(normalized_address)
+            except requests.RequestException:
+                logger.warning('Не удалось получить координаты адреса %r', normalized_address, exc_info=True)
+                found_coordinates[normalized_address] = stale_place.coordinates if stale_place else None
+                continue
+
+            found_coordinates[normalized_address] = coordinates
+            memory_cache.set(normalized_address, (coordinates, _get_expiration_time(coordinates, now)))
+            lat, lon = coordinates or (None, None)
+            if stale_place:
+                stale_place.lat, stale_place.lon, stale_place.updated_at = lat, lon, now
+                refreshed_places.append(stale_place)
+            else:
+                new_places.append(Place(address=normalized_address, lat=lat, lon=lon, updated_at=now))
+
+        Place.objects.bulk_create(new_places, ignore_conflicts=True)
+        Place.objects.bulk_update(refreshed_places, ['lat', 'lon', 'updated_at'])
+
+    return {
+        address: found_coordinates.get(normalized_address)
+        for address, normalized_address in normalized_addresses.items()
+    }
@@ -0,0 +1,59 @@
+from math import asin, cos, radians, sin, sqrt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(point1, point2):
+    lat1, lon1 = map(radians, point1)
+    lat2, lon2 = map(radians, point2)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def _haversine_matrix_numpy(points1, points2):
+    lat1, lon1 = np.radians(np.asarray(points1, dtype=float).reshape(-1, 2)).T
+    lat2, lon2 = np.radians(np.asarray(points2, dtype=float).reshape(-1, 2)).T
+    lat1, lon1 = lat1[:, np.newaxis], lon1[:, np.newaxis]
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _haversine_matrix_python(points1, points2):
+    # Trigonometry of each point is computed once, not once per pair
+    prepared_points2 = [
+        (lat, lon, cos(lat))
+        for lat, lon in ((radians(lat), radians(lon)) for lat, lon in points2)
+    ]
+    matrix = []
+    for lat1, lon1 in points1:
+        lat1, lon1 = radians(lat1), radians(lon1)
+        cos_lat1 = cos(lat1)
+        matrix.append([
+            2 * EARTH_RADIUS_KM * asin(sqrt(
+                sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * sin((lon2 - lon1) / 2) ** 2
+            ))
+            for lat2, lon2, cos_lat2 in prepared_points2
+        ])
+    return matrix
+
+
+def haversine_matrix(points1, points2, use_numpy=None):
+    """Distances in km between every (lat, lon) of points1 and of points2.
+
+    matrix[i][j] is the distance from points1[i] to points2[j]. Computed in
+    one vectorized pass when NumPy is installed, in pure Python otherwise.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy:
+        return _haversine_matrix_numpy(points1, points2)
+    return _haversine_matrix_python(points1, points2)
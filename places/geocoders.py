@@ -0,0 +1,60 @@
+import hashlib
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class YandexGeocoder:
+    url = 'https://geocode-maps.yandex.ru/1.x'
+
+    def __init__(self, apikey=None, timeout=5):
+        self.apikey = apikey or settings.YANDEX_GEOCODER_API_KEY
+        self.timeout = timeout
+
+    def geocode(self, address):
+        response = requests.get(self.url, params={
+            'geocode': address,
+            'apikey': self.apikey,
+            'format': 'json',
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+
+        if not found_places:
+            return None
+
+        most_relevant = found_places[0]
+        lon, lat = most_relevant['GeoObject']['Point']['pos'].split(' ')
+        return float(lat), float(lon)
+
+
+class OfflineGeocoder:
+    """Geocoder that needs no network, for development and tests.
+
+    Every address gets stable pseudo-random coordinates inside the given
+    bounding box, so distances are deterministic between runs.
+    """
+
+    def __init__(self, south=55.57, west=37.37, north=55.91, east=37.85):
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+
+    def geocode(self, address):
+        if not address.strip():
+            return None
+        digest = hashlib.sha256(address.strip().lower().encode()).digest()
+        lat_fraction = int.from_bytes(digest[:4], 'big') / 2 ** 32
+        lon_fraction = int.from_bytes(digest[4:8], 'big') / 2 ** 32
+        lat = self.south + (self.north - self.south) * lat_fraction
+        lon = self.west + (self.east - self.west) * lon_fraction
+        return round(lat, 6), round(lon, 6)
+
+
+def get_geocoder():
+    """Return the configured geocoder, or None if there is none."""
+    if not settings.GEOCODER_BACKEND:
+        return None
+    return import_string(settings.GEOCODER_BACKEND)()
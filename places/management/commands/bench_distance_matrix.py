@@ -0,0 +1,61 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from places import distance
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость расчёта матрицы расстояний с NumPy и на чистом Python'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=500)
+        parser.add_argument('--restaurants', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        order_points = [
+            (random.uniform(55.57, 55.91), random.uniform(37.37, 37.85))
+            for _ in range(options['orders'])
+        ]
+        restaurant_points = [
+            (random.uniform(55.57, 55.91), random.uniform(37.37, 37.85))
+            for _ in range(options['restaurants'])
+        ]
+
+        def compute_pairwise():
+            return [
+                [distance.haversine_km(order_point, restaurant_point) for restaurant_point in restaurant_points]
+                for order_point in order_points
+            ]
+
+        variants = {
+            'haversine_km для каждой пары': compute_pairwise,
+            'матрица на чистом Python': lambda: distance.haversine_matrix(
+                order_points, restaurant_points, use_numpy=False,
+            ),
+        }
+        if distance.np is not None:
+            variants['матрица на NumPy'] = lambda: distance.haversine_matrix(
+                order_points, restaurant_points, use_numpy=True,
+            )
+        else:
+            self.stderr.write('NumPy не установлен, вариант с NumPy пропущен.')
+
+        expected = compute_pairwise()
+        for name, compute in variants.items():
+            matrix = compute()
+            max_error = max(
+                abs(matrix[i][j] - expected[i][j])
+                for i in range(len(order_points))
+                for j in range(len(restaurant_points))
+            )
+            if max_error > 1e-6:
+                raise CommandError(f'{name}: расхождение {max_error} км')
+
+            best_time = min(timeit.repeat(compute, number=1, repeat=options['repeat']))
+            self.stdout.write(f'{name}: {best_time * 1000:.2f} мс')
+
+        self.stdout.write(f'Размер матрицы: {options["orders"]} × {options["restaurants"]}')
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=200, unique=True, verbose_name='нормализованный адрес')),
+                ('lat', models.FloatField(blank=True, null=True, verbose_name='широта')),
+                ('lon', models.FloatField(blank=True, null=True, verbose_name='долгота')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='обновлено')),
+            ],
+            options={
+                'verbose_name': 'место',
+                'verbose_name_plural': 'места',
+            },
+        ),
+    ]
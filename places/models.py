@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class Place(models.Model):
+    address = models.CharField(
+        'нормализованный адрес',
+        max_length=200,
+        unique=True,
+    )
+    lat = models.FloatField(
+        'широта',
+        null=True,
+        blank=True,
+    )
+    lon = models.FloatField(
+        'долгота',
+        null=True,
+        blank=True,
+    )
+    updated_at = models.DateTimeField(
+        'обновлено',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'место'
+        verbose_name_plural = 'места'
+
+    def __str__(self):
+        return self.address
+
+    @property
+    def coordinates(self):
+        if self.lat is None or self.lon is None:
+            return None
+        return self.lat, self.lon
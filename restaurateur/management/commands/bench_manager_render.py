@@ -0,0 +1,62 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from foodcartapp.models import Product, ProductCategory, Restaurant
+
+
+class Command(BaseCommand):
+    help = 'Измеряет время отрисовки и размер страницы меню менеджера для больших матриц товаров и ресторанов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', default=['50x10', '200x30', '500x50'], help='Товаров x ресторанов')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            products_count, restaurants_count = map(int, size.split('x'))
+            context = self.build_context(products_count, restaurants_count)
+
+            cold_seconds, html = self.render(context, options['repeat'], warm=False)
+            warm_seconds, _ = self.render(context, options['repeat'], warm=True)
+            self.stdout.write(
+                f'{size}: {len(html.encode()) / 1024:.0f} КБ HTML, '
+                f'отрисовка {cold_seconds * 1000:.1f} мс, '
+                f'с кэшем фрагмента {warm_seconds * 1000:.1f} мс'
+            )
+
+    def build_context(self, products_count, restaurants_count):
+        categories = [ProductCategory(id=number, name=f'Категория {number}') for number in range(1, 6)]
+        products = [
+            Product(
+                id=number,
+                name=f'Товар {number}',
+                category=random.choice(categories),
+                price=100,
+                image=f'product{number}.jpg',
+            )
+            for number in range(1, products_count + 1)
+        ]
+        restaurants = [Restaurant(id=number, name=f'Ресторан {number}') for number in range(1, restaurants_count + 1)]
+        return {
+            'products_with_restaurant_availability': [
+                (product, [random.random() < 0.7 for _ in restaurants])
+                for product in products
+            ],
+            'restaurants': restaurants,
+            'cache_timeout': 60,
+        }
+
+    def render(self, context, repeat, warm):
+        # Cold renders get a catalog version nobody has cached yet
+        version = f'bench-{random.random()}'
+        html = render_to_string('products_list.html', {**context, 'catalog_version': version})
+
+        started_at = time.perf_counter()
+        for _ in range(repeat):
+            if not warm:
+                version = f'bench-{random.random()}'
+            html = render_to_string('products_list.html', {**context, 'catalog_version': version})
+        return (time.perf_counter() - started_at) / repeat, html
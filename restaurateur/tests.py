@@ -1,3 +1,73 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
 
-# Create your tests here.
+from foodcartapp.availability import get_availability_index
+from foodcartapp.models import Order, OrderItem, Product, Restaurant, RestaurantMenuItem
+from star_burger.testing import StarBurgerTestCase
+
+from .views import ORDERS_PER_PAGE
+
+
+# Session, user, orders, their items, restaurants and cached coordinates
+ORDERS_PAGE_QUERIES = 6
+
+
+class OrdersPageTest(StarBurgerTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', is_staff=True)
+        cls.restaurants = [
+            Restaurant.objects.create(name=f'Star Burger {number}', address=f'Москва, Тверская, {number}')
+            for number in range(3)
+        ]
+        cls.products = [Product.objects.create(name=f'Бургер {number}', price=100 + number) for number in range(5)]
+        RestaurantMenuItem.objects.bulk_create([
+            RestaurantMenuItem(restaurant=restaurant, product=product)
+            for restaurant in cls.restaurants
+            for product in cls.products
+        ])
+
+    def setUp(self):
+        super().setUp()
+        # Loaded once per catalog version, not per page
+        get_availability_index()
+        self.client.force_login(self.manager)
+
+    def create_orders(self, count):
+        first_number = Order.objects.count()
+        Order.objects.bulk_create([
+            Order(
+                firstname='Иван',
+                lastname='Петров',
+                phonenumber='+79001234567',
+                address=f'Москва, Арбат, {number}',
+                order_key=f'order-{number}',
+            )
+            for number in range(first_number, first_number + count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order_id=order_id, product=product, quantity=2, price=product.price)
+            for order_id in Order.objects.filter(items__isnull=True).values_list('id', flat=True)
+            for product in self.products[:2]
+        ])
+
+    def assert_pages_query_count(self):
+        with self.assertNumQueries(ORDERS_PAGE_QUERIES):
+            response = self.client.get('/manager/orders/')
+        self.assertEqual(response.status_code, 200)
+        orders_with_restaurants = response.context['orders_with_restaurants']
+        self.assertEqual(len(orders_with_restaurants), min(Order.objects.count(), ORDERS_PER_PAGE))
+
+        after_id = Order.objects.order_by('id').values_list('id', flat=True)[Order.objects.count() // 2]
+        with self.assertNumQueries(ORDERS_PAGE_QUERIES):
+            response = self.client.get('/manager/orders/', {'after': after_id})
+        self.assertEqual(response.status_code, 200)
+        for order, candidates in response.context['orders_with_restaurants']:
+            self.assertGreater(order.id, after_id)
+            self.assertEqual(len(candidates), len(self.restaurants))
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self.create_orders(10)
+        self.assert_pages_query_count()
+
+        self.create_orders(9990)
+        self.assert_pages_query_count()
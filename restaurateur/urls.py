@@ -9,12 +9,15 @@ urlpatterns = [
     path('', lambda request: redirect('restaurateur:ProductsView')),
 
     path('products/', views.view_products, name="ProductsView"),
+    path('products/availability/', views.edit_menu_availability, name="edit_menu_availability"),
 
     path('restaurants/', views.view_restaurants, name="RestaurantView"),
 
-    # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
 
+    path('sales/', views.view_sales, name="view_sales"),
+    path('sales/rollup/', views.rollup_sales, name="rollup_sales"),
+
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
 ]
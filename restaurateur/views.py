@@ -1,14 +1,26 @@
+import datetime
+
 from django import forms
+from django.conf import settings
+from django.db.models import Prefetch, Sum
 from django.shortcuts import redirect, render
 from django.views import View
+from django.views.decorators.http import require_POST
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from django.contrib.auth.decorators import user_passes_test
 
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
 
 
-from foodcartapp.models import Product, Restaurant
+from foodcartapp.assignment import rank_restaurants
+from foodcartapp.availability import get_availability_index, set_menu_availability
+from foodcartapp.menu_cache import get_catalog_version
+from foodcartapp.models import DailySales, Order, OrderItem, Product, Restaurant
+from foodcartapp.sales import get_sales_timezone, rollup_daily_sales
+from star_burger.db_routers import use_read_database
 
 
 class Login(forms.Form):
@@ -28,6 +40,36 @@ class Login(forms.Form):
     )
 
 
+class MenuAvailabilityForm(forms.Form):
+    products = forms.ModelMultipleChoiceField(
+        label='Товары', required=True,
+        queryset=Product.objects.order_by('name'),
+        widget=forms.CheckboxSelectMultiple,
+    )
+    restaurants = forms.ModelMultipleChoiceField(
+        label='Рестораны', required=True,
+        queryset=Restaurant.objects.order_by('name'),
+        widget=forms.CheckboxSelectMultiple,
+    )
+    available = forms.TypedChoiceField(
+        label='В продаже', required=True,
+        choices=[('1', 'Включить'), ('0', 'Убрать из продажи')],
+        coerce=lambda value: value == '1',
+        widget=forms.RadioSelect,
+    )
+
+
+class SalesPeriodForm(forms.Form):
+    since = forms.DateField(
+        label='С', required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+    )
+    until = forms.DateField(
+        label='по', required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+    )
+
+
 class LoginView(View):
     def get(self, request, *args, **kwargs):
         form = Login()
@@ -59,39 +101,158 @@ class LogoutView(auth_views.LogoutView):
     next_page = reverse_lazy('restaurateur:login')
 
 
+ORDERS_PER_PAGE = 50
+
+
+def _parse_order_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
 def is_manager(user):
     return user.is_staff  # FIXME replace with specific permission
 
 
-@user_passes_test(is_manager, login_url='restaurateur:login')
-def view_products(request):
-    restaurants = list(Restaurant.objects.order_by('name'))
-    products = list(Product.objects.prefetch_related('menu_items'))
+def get_products_with_restaurant_availability(restaurants):
+    products = Product.objects.select_related('category')
+    availability_index = get_availability_index()
+    restaurant_ids = [restaurant.id for restaurant in restaurants]
+    return [
+        (product, availability_index.get_availability_row(product.id, restaurant_ids))
+        for product in products
+    ]
 
-    products_with_restaurant_availability = []
-    for product in products:
-        availability = {item.restaurant_id: item.availability for item in product.menu_items.all()}
-        ordered_availability = [availability.get(restaurant.id, False) for restaurant in restaurants]
 
-        products_with_restaurant_availability.append(
-            (product, ordered_availability)
-        )
+@user_passes_test(is_manager, login_url='restaurateur:login')
+@use_read_database
+def view_products(request):
+    # The table is a template fragment cached per catalog version, the
+    # queries run only when it has to be rendered anew
+    restaurants = SimpleLazyObject(lambda: list(Restaurant.objects.order_by('name')))
 
     return render(request, template_name="products_list.html", context={
-        'products_with_restaurant_availability': products_with_restaurant_availability,
+        'products_with_restaurant_availability': SimpleLazyObject(
+            lambda: get_products_with_restaurant_availability(restaurants)
+        ),
         'restaurants': restaurants,
+        'catalog_version': get_catalog_version(),
+        'cache_timeout': settings.MENU_CACHE_TIMEOUT,
     })
 
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
+def edit_menu_availability(request):
+    if request.method == 'POST':
+        form = MenuAvailabilityForm(request.POST)
+        if form.is_valid():
+            set_menu_availability(
+                [restaurant.id for restaurant in form.cleaned_data['restaurants']],
+                [product.id for product in form.cleaned_data['products']],
+                form.cleaned_data['available'],
+            )
+            return redirect('restaurateur:ProductsView')
+    else:
+        form = MenuAvailabilityForm(initial={
+            'products': request.GET.getlist('product'),
+            'available': '1',
+        })
+
+    return render(request, template_name='menu_availability_form.html', context={
+        'form': form,
+    })
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+@use_read_database
 def view_restaurants(request):
     return render(request, template_name="restaurants_list.html", context={
         'restaurants': Restaurant.objects.all(),
+        'catalog_version': get_catalog_version(),
+        'cache_timeout': settings.MENU_CACHE_TIMEOUT,
     })
 
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_orders(request):
+    orders = (
+        Order.objects
+        .filter(status=Order.UNPROCESSED)
+        .with_total()
+        .prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product')),
+        )
+    )
+
+    # Keyset pagination: pages are addressed by the boundary id, so every
+    # page is an index range scan however deep it is
+    after_id = _parse_order_id(request.GET.get('after'))
+    before_id = _parse_order_id(request.GET.get('before'))
+    if before_id is not None:
+        orders = list(orders.filter(id__lt=before_id).order_by('-id')[:ORDERS_PER_PAGE + 1])
+        has_previous_page = len(orders) > ORDERS_PER_PAGE
+        orders = orders[:ORDERS_PER_PAGE][::-1]
+        has_next_page = True
+    else:
+        if after_id is not None:
+            orders = orders.filter(id__gt=after_id)
+        orders = list(orders.order_by('id')[:ORDERS_PER_PAGE + 1])
+        has_next_page = len(orders) > ORDERS_PER_PAGE
+        orders = orders[:ORDERS_PER_PAGE]
+        has_previous_page = after_id is not None
+
+    ranked_restaurants = rank_restaurants(orders)
+
     return render(request, template_name='order_items.html', context={
-        # TODO заглушка для нереализованного функционала
+        'orders_with_restaurants': [
+            (order, ranked_restaurants[order.id]) for order in orders
+        ],
+        'previous_page_before': orders[0].id if orders and has_previous_page else None,
+        'next_page_after': orders[-1].id if orders and has_next_page else None,
     })
+
+
+SALES_REPORT_DAYS = 30
+TOP_PRODUCTS_COUNT = 10
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+@use_read_database
+def view_sales(request):
+    today = timezone.localtime(timezone.now(), get_sales_timezone()).date()
+    since = today - datetime.timedelta(days=SALES_REPORT_DAYS - 1)
+    until = today
+    form = SalesPeriodForm(request.GET or None)
+    if form.is_valid():
+        since = form.cleaned_data['since'] or since
+        until = form.cleaned_data['until'] or until
+
+    # Only the rollup is read here, never orders themselves
+    sales = DailySales.objects.filter(date__gte=since, date__lte=until)
+    return render(request, template_name='sales_report.html', context={
+        'form': form,
+        'since': since,
+        'until': until,
+        'totals': sales.aggregate(revenue=Sum('revenue'), quantity=Sum('quantity')),
+        'restaurant_days': (
+            sales
+            .values('date', 'restaurant__name')
+            .annotate(revenue=Sum('revenue'), quantity=Sum('quantity'))
+            .order_by('-date', 'restaurant__name')
+        ),
+        'top_products': (
+            sales
+            .values('product__name')
+            .annotate(revenue=Sum('revenue'), quantity=Sum('quantity'), orders_count=Sum('orders_count'))
+            .order_by('-revenue')[:TOP_PRODUCTS_COUNT]
+        ),
+        'rolled_up_until': DailySales.objects.order_by('-date').values_list('date', flat=True).first(),
+    })
+
+
+@require_POST
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def rollup_sales(request):
+    rollup_daily_sales()
+    return redirect('restaurateur:view_sales')
@@ -0,0 +1,59 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import connections
+
+
+READ_DATABASE_ALIAS = 'read'
+
+_use_read_database = ContextVar('use_read_database', default=False)
+
+
+@contextmanager
+def read_database():
+    token = _use_read_database.set(True)
+    try:
+        yield
+    finally:
+        _use_read_database.reset(token)
+
+
+def _iter_in_read_database(chunks):
+    with read_database():
+        yield from chunks
+
+
+def use_read_database(view):
+    """Send the view's queries to the read-only alias when it is configured.
+
+    Streaming responses query the database while they are being sent, so
+    their content is consumed under the same routing.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with read_database():
+            response = view(*args, **kwargs)
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _iter_in_read_database(response.streaming_content)
+        return response
+    return wrapper
+
+
+class ReadDatabaseRouter:
+    def db_for_read(self, model, **hints):
+        if _use_read_database.get() and READ_DATABASE_ALIAS in connections.databases:
+            return READ_DATABASE_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases point to the same database file
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == READ_DATABASE_ALIAS:
+            return False
+        return None
@@ -0,0 +1,116 @@
+"""PostgreSQL backend that keeps physical connections in a thread-safe pool.
+
+Django opens a connection per thread and closes it at the end of each
+request (or after CONN_MAX_AGE). With this backend "closing" returns the
+connection to a process-wide psycopg2 ThreadedConnectionPool, so threaded
+WSGI workers reuse a small number of warm connections. Every connection is
+checked with a cheap query when it is taken from the pool, so connections
+dropped by the server or a proxy are replaced transparently.
+
+OPTIONS:
+    POOL_MIN_SIZE       connections opened up front, 1 by default
+    POOL_MAX_SIZE       hard limit per process, 10 by default; keep it not
+                        lower than the number of worker threads
+    POOL_HEALTH_CHECKS  ping connections on checkout, True by default
+"""
+import threading
+
+import psycopg2
+import psycopg2.extras
+from psycopg2.pool import ThreadedConnectionPool
+from django.db.backends.postgresql import base, creation
+
+
+POOL_OPTIONS = {
+    'POOL_MIN_SIZE': 1,
+    'POOL_MAX_SIZE': 10,
+    'POOL_HEALTH_CHECKS': True,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(conn_params, min_size, max_size):
+    pool_key = tuple(sorted(conn_params.items()))
+    with _pools_lock:
+        pool = _pools.get(pool_key)
+        if pool is None:
+            pool = ThreadedConnectionPool(min_size, max_size, **conn_params)
+            _pools[pool_key] = pool
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+def _is_healthy(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would block DROP DATABASE
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool_option(self, name):
+        return self.settings_dict['OPTIONS'].get(name, POOL_OPTIONS[name])
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        for name in POOL_OPTIONS:
+            conn_params.pop(name, None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = _get_pool(
+            conn_params,
+            self.get_pool_option('POOL_MIN_SIZE'),
+            self.get_pool_option('POOL_MAX_SIZE'),
+        )
+        connection = pool.getconn()
+        if self.get_pool_option('POOL_HEALTH_CHECKS') and not _is_healthy(connection):
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+        self.connection_pool = pool
+
+        # The rest mirrors the stock backend, it runs on every checkout
+        # because the previous user may have changed the session
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = getattr(self, 'connection_pool', None)
+        if pool is None or pool.closed:
+            return super()._close()
+        with self.wrap_database_errors:
+            # The pool rolls back unfinished transactions and discards
+            # connections in an unknown state
+            pool.putconn(self.connection, close=bool(self.connection.closed))
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 import dj_database_url
 
@@ -14,34 +15,40 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 SECRET_KEY = env('SECRET_KEY')
 DEBUG = env.bool('DEBUG', True)
+# The toolbar is a dev tool: with DEBUG off it is neither installed nor imported
+DEBUG_TOOLBAR = DEBUG and env.bool('DEBUG_TOOLBAR', True)
 
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', ['127.0.0.1', 'localhost'])
 
 INSTALLED_APPS = [
     'foodcartapp.apps.FoodcartappConfig',
     'restaurateur.apps.RestaurateurConfig',
+    'places.apps.PlacesConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
 ROOT_URLCONF = 'star_burger.urls'
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 DEBUG_TOOLBAR_PANELS = [
     'debug_toolbar.panels.versions.VersionsPanel',
     'debug_toolbar.panels.timer.TimerPanel',
@@ -57,20 +64,34 @@ DEBUG_TOOLBAR_PANELS = [
     'debug_toolbar.panels.redirects.RedirectsPanel',
 ]
 
+template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+template_context_processors = [
+    'django.template.context_processors.request',
+    'django.contrib.auth.context_processors.auth',
+    'django.contrib.messages.context_processors.messages',
+]
+
+if DEBUG:
+    template_context_processors.insert(0, 'django.template.context_processors.debug')
+else:
+    # Compile every template once per process instead of on every render
+    template_loaders = [
+        ('django.template.loaders.cached.Loader', template_loaders),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [
             os.path.join(BASE_DIR, "templates"),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
+            'context_processors': template_context_processors,
+            'loaders': template_loaders,
         },
     },
 ]
@@ -79,13 +100,61 @@ WSGI_APPLICATION = 'star_burger.wsgi.application'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+SERVE_MEDIA = env.bool('SERVE_MEDIA', DEBUG)
 
 DATABASES = {
     'default': dj_database_url.config(
-        default='sqlite:////{0}'.format(os.path.join(BASE_DIR, 'db.sqlite3'))
+        default='sqlite:////{0}'.format(os.path.join(BASE_DIR, 'db.sqlite3')),
+        conn_max_age=env.int('DB_CONN_MAX_AGE', 0),
     )
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = env.bool('DB_DISABLE_SERVER_SIDE_CURSORS', False)
+    if env.bool('DB_POOL', False):
+        DATABASES['default']['ENGINE'] = 'star_burger.postgresql_pool'
+        # The pool keeps connections alive, Django should hand them back after every request
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default'].setdefault('OPTIONS', {}).update({
+            'POOL_MIN_SIZE': env.int('DB_POOL_MIN_SIZE', 1),
+            'POOL_MAX_SIZE': env.int('DB_POOL_MAX_SIZE', 10),
+        })
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and env.bool('SQLITE_PERFORMANCE_MODE', False):
+    DATABASES['default']['ENGINE'] = 'star_burger.sqlite_tuned'
+    DATABASES['read'] = {
+        **DATABASES['default'],
+        'OPTIONS': {'QUERY_ONLY': True},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['star_burger.db_routers.ReadDatabaseRouter']
+
+# The catalog version lives here: every process and management command
+# must see the same cache, or they never learn about each other's changes.
+# The default sits outside the project so runs never litter the working tree
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'star_burger_cache')
+CACHES = {
+    'default': env.dj_cache_url('CACHE_URL', 'file://{0}?max_entries=5000'.format(DEFAULT_CACHE_DIR)),
+}
+
+MENU_CACHE_ALIAS = 'default'
+MENU_CACHE_LRU_SIZE = env.int('MENU_CACHE_LRU_SIZE', 32)
+MENU_CACHE_TIMEOUT = env.int('MENU_CACHE_TIMEOUT', 24 * 60 * 60)
+
+ORDER_QUEUE_ENABLED = env.bool('ORDER_QUEUE_ENABLED', True)
+ORDER_QUEUE_PATH = env('ORDER_QUEUE_PATH', os.path.join(BASE_DIR, 'order_queue.sqlite3'))
+
+# Sales reports split days by local time of the restaurants, not by UTC
+SALES_TIME_ZONE = env('SALES_TIME_ZONE', 'Europe/Moscow')
+
+# Without a geocoder addresses stay unresolved and distances are shown as unknown
+GEOCODER_BACKEND = env('GEOCODER_BACKEND', '')
+YANDEX_GEOCODER_API_KEY = env('YANDEX_GEOCODER_API_KEY', '')
+PLACES_TTL = env.int('PLACES_TTL', 30 * 24 * 60 * 60)
+PLACES_NEGATIVE_TTL = env.int('PLACES_NEGATIVE_TTL', 24 * 60 * 60)
+PLACES_LRU_SIZE = env.int('PLACES_LRU_SIZE', 10000)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -113,6 +182,10 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# collectstatic writes files with a content hash in the name plus .gz and
+# .br siblings; WhiteNoise serves those with an immutable Cache-Control
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
 INTERNAL_IPS = [
     '127.0.0.1'
 ]
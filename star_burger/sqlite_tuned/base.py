@@ -0,0 +1,49 @@
+"""SQLite backend tuned for a site with concurrent readers and writers.
+
+Every new connection switches the database to WAL, so readers never block
+the writer and vice versa, waits for locks instead of failing at once,
+and gets memory-mapped I/O and a bigger page cache. Write transactions
+start with BEGIN IMMEDIATE: a deferred transaction that later upgrades to
+a write lock fails with "database is locked" right away, without honouring
+busy_timeout.
+
+OPTIONS:
+    QUERY_ONLY  open the connection with PRAGMA query_only, for read aliases
+"""
+from django.db.backends.sqlite3 import base
+
+
+PRAGMAS = [
+    'journal_mode = WAL',
+    # In WAL mode NORMAL is still safe against corruption, a power loss can
+    # only roll back the last transactions
+    'synchronous = NORMAL',
+    'busy_timeout = 5000',
+    'mmap_size = 268435456',
+    'cache_size = -65536',
+    'temp_store = MEMORY',
+]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def is_query_only(self):
+        return self.settings_dict['OPTIONS'].get('QUERY_ONLY', False)
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('QUERY_ONLY', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for pragma in PRAGMAS:
+            connection.execute(f'PRAGMA {pragma}')
+        if self.is_query_only:
+            connection.execute('PRAGMA query_only = ON')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if self.is_query_only:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,35 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """Put a hash of the content into every saved file name.
+
+    A new upload always gets a new URL, so media can be cached forever.
+    Uploading the same content twice reuses the stored file.
+    """
+
+    hash_length = 12
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        hasher = hashlib.md5()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        content.seek(0)
+
+        root, ext = os.path.splitext(name)
+        hashed_name = f'{root}.{hasher.hexdigest()[:self.hash_length]}{ext}'
+        if self.exists(hashed_name):
+            return hashed_name
+        return super().save(hashed_name, content, max_length=max_length)
+
+
+hashed_media_storage = HashedMediaStorage()
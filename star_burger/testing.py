@@ -0,0 +1,29 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from places.coordinates import memory_cache
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Pages are rendered without collectstatic and its manifest
+PLAIN_STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+
+@override_settings(CACHES=LOCMEM_CACHES, STATICFILES_STORAGE=PLAIN_STATICFILES_STORAGE)
+class StarBurgerTestCase(TestCase):
+    """A test case with its own in-process cache, emptied before every test.
+
+    A fresh cache also means a fresh catalog version, so nothing cached by
+    another test or by a running site leaks in. Coordinates remembered in
+    process are dropped too, their places are rolled back with each test.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        memory_cache.clear()
@@ -0,0 +1,18 @@
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+
+# Names written by HashedMediaStorage: "<name>.<12 hex digits>.<ext>"
+HASHED_MEDIA_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def serve_media(request, path):
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if response.status_code == 200 and HASHED_MEDIA_NAME_RE.search(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response